@@ -0,0 +1,148 @@
+"""
+Delivery benchmark against the local stand-in Bot API (benchmarks/fake_bot_api.py).
+
+    python -m benchmarks.bench_delivery --chats 300 --backlog 150 --burst 10
+
+Queues a SHRIMP alert for --backlog users, then --burst FISH alerts each to
+--burst-chats users and --groups group chats (a series flood), then one MEGA
+WHALE alert to --chats users. Runs it twice: once with the old one-at-a-time
+send loop and once through DeliveryEngine. Reports messages the server
+accepted, flood rejections, wall time, per-tier delivery times and per-chat
+ordering, as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+# telegram_service builds a Bot at import; it only ever talks to the stand-in here
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:benchmark")
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+
+from benchmarks.fake_bot_api import FakeBotAPI  # noqa: E402
+from services.telegram_service import DeliveryEngine  # noqa: E402
+
+
+def build_workload(chats, burst_chats, burst, groups, backlog):
+    """
+    [(chat_id, text, level)] in submission order: a SHRIMP backlog first,
+    then a series flood, then the MEGA WHALE fan-out. Text is
+    "<chat>:<level>:<seq>" for ordering checks.
+    """
+    fanout_chats = range(1, chats + 1)
+    messages = []
+    for chat_id in fanout_chats[:backlog]:
+        messages.append((chat_id, f"{chat_id}:500:0", 500))
+    flood = list(range(1, burst_chats + 1)) + [-1000000 - g for g in range(groups)]
+    for seq in range(burst):
+        for chat_id in flood:
+            messages.append((chat_id, f"{chat_id}:2000:{seq}", 2000))
+    for chat_id in fanout_chats:
+        messages.append((chat_id, f"{chat_id}:100000:0", 100000))
+    return messages
+
+
+def check_order(accepted):
+    """Chats whose accepted messages of one tier arrived out of sequence."""
+    last = {}
+    bad = set()
+    for _, chat_id, text in accepted:
+        _, level, seq = text.split(":")
+        if int(seq) < last.get((chat_id, level), -1):
+            bad.add(chat_id)
+        last[(chat_id, level)] = int(seq)
+    return len(bad)
+
+
+def tier_timings(accepted, start):
+    """Per tier: seconds from start until half / all of its accepted messages were delivered."""
+    by_level = {}
+    for t, _, text in accepted:
+        by_level.setdefault(int(text.split(":")[1]), []).append(t - start)
+    return {
+        str(level): {"delivered": len(times), "p50_sec": round(sorted(times)[len(times) // 2], 2),
+                     "last_sec": round(max(times), 2)}
+        for level, times in sorted(by_level.items(), reverse=True)
+    }
+
+
+async def run_mode(mode, messages, args):
+    server = FakeBotAPI(latency=args.latency_ms / 1000, error_rate=args.error_rate, seed=args.seed)
+    url = await server.start()
+    bot = Bot(token="123456:benchmark", session=AiohttpSession(api=TelegramAPIServer.from_base(url)))
+
+    async def send(chat_id, text):
+        await bot.send_message(chat_id=chat_id, text=text)
+
+    engine_stats = None
+    start = time.perf_counter()
+    start_mono = time.monotonic()
+    try:
+        if mode == "sequential":
+            # send_trade_alert before the delivery engine: one request at a time, errors dropped
+            for chat_id, text, _ in messages:
+                try:
+                    await send(chat_id, text)
+                except Exception:
+                    pass
+        else:
+            engine = DeliveryEngine(send, workers=args.workers)
+            engine.start()
+            for chat_id, text, level in messages:
+                await engine.submit(chat_id, text, level)
+            await engine.close(timeout=args.timeout)
+            engine_stats = engine.get_stats()
+        elapsed = time.perf_counter() - start
+    finally:
+        await bot.session.close()
+        await server.stop()
+
+    result = {
+        "submitted": len(messages),
+        "wall_sec": round(elapsed, 2),
+        "tiers": tier_timings(server.accepted, start_mono),
+        "out_of_order_chats": check_order(server.accepted),
+        **server.get_stats(),
+    }
+    if engine_stats:
+        result["engine"] = engine_stats
+    return result
+
+
+async def run(args):
+    messages = build_workload(args.chats, args.burst_chats, args.burst, args.groups, args.backlog)
+    report = {"params": vars(args)}
+    for mode in ("sequential", "engine"):
+        report[mode] = await run_mode(mode, messages, args)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=300, help="users receiving the fan-out alert")
+    parser.add_argument("--backlog", type=int, default=150, help="fan-out users with a SHRIMP alert queued first")
+    parser.add_argument("--burst-chats", type=int, default=5, help="users receiving a flood of alerts")
+    parser.add_argument("--groups", type=int, default=1, help="group chats receiving the flood")
+    parser.add_argument("--burst", type=int, default=10, help="alerts per flooded chat")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=50, help="stand-in server response time")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 502")
+    parser.add_argument("--timeout", type=float, default=120, help="engine drain timeout")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    args = parser.parse_args()
+
+    output = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
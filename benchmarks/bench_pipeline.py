@@ -0,0 +1,265 @@
+"""
+End-to-end pipeline benchmark over synthetic trade streams.
+
+    python -m benchmarks.bench_pipeline --profile sports_night --output bench.json
+    python -m benchmarks.bench_pipeline --baseline bench.json --tolerance 0.2
+
+Measures throughput and per-item latency of each stage and writes JSON.
+With --baseline, exits non-zero if any stage's throughput dropped by more
+than --tolerance against a previous run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+# handle_trade's module imports the bot; it is never contacted here
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:benchmark")
+
+from benchmarks.synthetic import PROFILES, generate_trades, generate_subscribers  # noqa: E402
+from core.categories import detect_category  # noqa: E402
+from services.aggregator import TradeAggregator  # noqa: E402
+from services.polymarket import TradePersistence  # noqa: E402
+
+PAGE_SIZE = 1000  # trades per simulated poll page
+
+
+def _summarize(latencies_ns, items=None):
+    """Throughput and latency percentiles for one stage."""
+    latencies_ns = sorted(latencies_ns)
+    n = len(latencies_ns)
+    total_ns = sum(latencies_ns)
+    items = items if items is not None else n
+
+    def pct(p):
+        return latencies_ns[min(n - 1, int(n * p))] / 1000 if n else 0.0
+
+    return {
+        "items": items,
+        "total_sec": round(total_ns / 1e9, 4),
+        "throughput_per_sec": round(items / (total_ns / 1e9), 1) if total_ns else 0.0,
+        "p50_us": round(pct(0.50), 2),
+        "p95_us": round(pct(0.95), 2),
+        "p99_us": round(pct(0.99), 2),
+        "max_us": round(latencies_ns[-1] / 1000, 2) if n else 0.0,
+    }
+
+
+def _pages(trades):
+    """Oldest-first pages, as poll_trades feeds them downstream."""
+    ordered = trades[::-1]
+    return [ordered[i:i + PAGE_SIZE] for i in range(0, len(ordered), PAGE_SIZE)]
+
+
+def bench_generate_key(persistence, trades):
+    lat = []
+    clock = time.perf_counter_ns
+    for trade in trades:
+        t0 = clock()
+        persistence.generate_key(trade)
+        lat.append(clock() - t0)
+    return _summarize(lat)
+
+
+def bench_dedup(persistence, trades):
+    """Cold pass (every key new, written per page), a warm pass (all seen), then batch lookups."""
+    clock = time.perf_counter_ns
+    keys_by_page = [[persistence.generate_key(t) for t in page] for page in _pages(trades)]
+
+    miss_lat, batch_lat = [], []
+    for keys in keys_by_page:
+        for key in keys:
+            t0 = clock()
+            persistence.is_seen(key)
+            miss_lat.append(clock() - t0)
+        t0 = clock()
+        persistence.add_batch(keys)
+        batch_lat.append(clock() - t0)
+
+    hit_lat = []
+    for keys in keys_by_page:
+        for key in keys:
+            t0 = clock()
+            persistence.is_seen(key)
+            hit_lat.append(clock() - t0)
+
+    # Batch lookup with a cold LRU, as after a restart: every key hits SQLite
+    persistence.lru.clear()
+    batch_lookup_lat = []
+    for keys in keys_by_page:
+        t0 = clock()
+        persistence.filter_new(keys)
+        batch_lookup_lat.append(clock() - t0)
+
+    return {
+        "is_seen_miss": _summarize(miss_lat),
+        "is_seen_hit": _summarize(hit_lat),
+        "filter_new_cold": _summarize(batch_lookup_lat, items=sum(len(k) for k in keys_by_page)),
+        "add_batch": _summarize(batch_lat, items=sum(len(k) for k in keys_by_page)),
+    }
+
+
+def bench_aggregator(trades):
+    aggregator = TradeAggregator()
+    clock = time.perf_counter_ns
+    lat, cleanup_lat, alerts = [], [], []
+    for page in _pages(trades):
+        for trade in page:
+            t0 = clock()
+            agg = aggregator.process_trade(trade)
+            lat.append(clock() - t0)
+            if agg:
+                alerts.append(agg)
+        aggregator.last_cleanup = 0  # force the periodic scan once per page
+        t0 = clock()
+        aggregator.cleanup()
+        cleanup_lat.append(clock() - t0)
+    return {
+        "process_trade": _summarize(lat),
+        "cleanup": _summarize(cleanup_lat),
+        "alerts": len(alerts),
+    }, alerts
+
+
+def bench_categories(trades):
+    lat = []
+    clock = time.perf_counter_ns
+    for trade in trades:
+        t0 = clock()
+        detect_category(trade['title'], f"{trade['slug']} {trade['eventSlug']}")
+        lat.append(clock() - t0)
+    return _summarize(lat)
+
+
+def _install_subscribers(subscribers):
+    from services import telegram_service as tg
+    for store in (tg.user_filters, tg.user_categories, tg.user_languages,
+                  tg.user_statuses, tg.user_probabilities):
+        store.clear()
+    for chat_id, s in subscribers.items():
+        tg.user_filters[chat_id] = s['filter']
+        tg.user_categories[chat_id] = s['categories']
+        tg.user_languages[chat_id] = s['language']
+        tg.user_statuses[chat_id] = s['status']
+        tg.user_probabilities[chat_id] = s['probability']
+    tg.rebuild_subscriber_index()
+
+
+async def bench_fanout(alerts, subscriber_count):
+    import main
+    main.DEFAULT_CHAT_ID = None
+    _install_subscribers(generate_subscribers(subscriber_count))
+
+    messages = 0
+
+    async def stub_send(chat_id, text, level=None):
+        nonlocal messages
+        messages += 1
+
+    lat = []
+    clock = time.perf_counter_ns
+    for alert in alerts:
+        t0 = clock()
+        await main.handle_trade(alert, send=stub_send)
+        lat.append(clock() - t0)
+    result = _summarize(lat)
+    result["subscribers"] = subscriber_count
+    result["messages"] = messages
+    return result
+
+
+def run(profile, seed, **overrides):
+    params = dict(PROFILES[profile], **overrides)
+    t0 = time.perf_counter()
+    trades = generate_trades(profile, seed=seed, **overrides)
+    gen_sec = time.perf_counter() - t0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence = TradePersistence(os.path.join(tmp, "bench.db"))
+        try:
+            results["generate_key"] = bench_generate_key(persistence, trades)
+            results.update(bench_dedup(persistence, trades))
+        finally:
+            persistence.close()
+
+    agg_results, alerts = bench_aggregator(trades)
+    results["process_trade"] = agg_results["process_trade"]
+    results["aggregator_cleanup"] = agg_results["cleanup"]
+    results["detect_category"] = bench_categories(trades)
+    results["handle_trade_fanout"] = asyncio.run(bench_fanout(alerts, params['subscribers']))
+
+    return {
+        "profile": profile,
+        "params": params,
+        "seed": seed,
+        "python": platform.python_version(),
+        "generated_trades": len(trades),
+        "alerts": agg_results["alerts"],
+        "generation_sec": round(gen_sec, 3),
+        "stages": results,
+    }
+
+
+def best_of(reports):
+    """Keep each stage's fastest run to damp scheduler noise."""
+    best = reports[0]
+    for report in reports[1:]:
+        for name, result in report["stages"].items():
+            if result["throughput_per_sec"] > best["stages"][name]["throughput_per_sec"]:
+                best["stages"][name] = result
+    best["repeats"] = len(reports)
+    return best
+
+
+def _stage_throughputs(report):
+    return {name: r["throughput_per_sec"] for name, r in report["stages"].items()}
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of regression descriptions (empty if none)."""
+    current = _stage_throughputs(report)
+    regressions = []
+    for name, base in _stage_throughputs(baseline).items():
+        if name in current and base > 0 and current[name] < base * (1 - tolerance):
+            regressions.append(f"{name}: {current[name]:,.0f}/s vs baseline {base:,.0f}/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="normal")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--trades", type=int, help="override the profile's trade count")
+    parser.add_argument("--subscribers", type=int, help="override the profile's subscriber count")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, best one is reported")
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="previous JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    overrides = {k: v for k, v in (("trades", args.trades), ("subscribers", args.subscribers)) if v}
+    report = best_of([run(args.profile, args.seed, **overrides) for _ in range(max(1, args.repeat))])
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
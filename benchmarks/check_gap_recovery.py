@@ -0,0 +1,201 @@
+"""
+Check that gap recovery never loses trades and never over-fetches.
+
+    python -m benchmarks.check_gap_recovery --burst 1500
+
+Drives PolymarketService.poll_trades against an in-memory /trades history
+served by offset and limit, through three scenarios:
+
+- outage: a first poll loads some history, then --failures polls fail
+  outright, then --burst new trades arrive at once and the service is
+  polled until the watermark catches up. The first --recovery-failures
+  requests for deeper pages fail too.
+- routine: steady arrivals settle the page size, then --routine-burst
+  trades arrive in one poll, just past page_limit, as happens whenever
+  arrivals outrun the rate estimate.
+- long outage: steady arrivals settle the rate estimate, then --failures
+  polls fail while --long-burst trades arrive. Recovery must take a
+  single wave of requests.
+- refused depth: like outage, but with a --deep-burst the API cannot serve,
+  because it rejects requests reaching past --api-max-depth.
+
+In the first three, every new trade must reach the aggregator exactly once, the
+watermark must reach the newest trade, and the poll that recovers the gap
+may download at most --max-overfetch times the trades it was missing plus
+one page. In the last, the unreachable part is written off: the watermark
+must still reach the newest trade within the catch-up polls, every trade
+the API does serve must be processed (give or take one minimum page), and
+no trade may be processed twice. Exits non-zero otherwise.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_trades
+from services.polymarket import (
+    GAP_FETCH_CONCURRENCY, GAP_MAX_UNRECOVERED_POLLS, MIN_PAGE_LIMIT, PolymarketService,
+)
+
+
+class ScriptedService(PolymarketService):
+    """PolymarketService whose Data API is a list of trades and a poll script."""
+
+    def __init__(self, db_path, history, script, recovery_failures=0, api_max_depth=None):
+        super().__init__(db_path=db_path)
+        self.history = history  # newest first, like /trades
+        self.script = list(script)  # per poll: "ok", "fail", or a list of trades to publish first
+        self.failing = False
+        self.recovery_failures = recovery_failures
+        self.api_max_depth = api_max_depth  # requests reaching deeper than this fail
+        self.requests = 0
+        self.trades_fetched = 0
+        self.polls = []  # per finished poll: (page_limit at its start, requests, trades fetched)
+        self._poll_start = (self.page_limit, 0, 0)
+        # Count what reaches the aggregator, not just what dedup let through
+        self.aggregated = 0
+        process_trade = self.aggregator.process_trade
+
+        def counting_process_trade(trade):
+            self.aggregated += 1
+            return process_trade(trade)
+
+        self.aggregator.process_trade = counting_process_trade
+
+    async def _fetch_recent_trades(self, limit=10000, offset=0, min_size=10):
+        self.requests += 1
+        failed = self.failing
+        if offset and self.recovery_failures:
+            self.recovery_failures -= 1
+            failed = True
+        if self.api_max_depth and offset + limit > self.api_max_depth:
+            failed = True
+        if failed:
+            self.consecutive_errors += 1
+            return None
+        self.consecutive_errors = 0
+        page = self.history[offset:offset + limit]
+        self.trades_fetched += len(page)
+        return page
+
+    async def _wait_next_poll(self, interval):
+        page_limit, requests, fetched = self._poll_start
+        self.polls.append((page_limit, self.requests - requests, self.trades_fetched - fetched))
+        self._poll_start = (self.page_limit, self.requests, self.trades_fetched)
+        if not self.script:
+            self.running = False
+            return
+        step = self.script.pop(0)
+        self.failing = step == "fail"
+        if isinstance(step, list):
+            self.history[:0] = step
+
+
+def batches(stream, sizes):
+    """Split a newest-first stream into consecutive batches, oldest batch first, each newest first."""
+    oldest_first = stream[::-1]
+    out = []
+    start = 0
+    for n in sizes:
+        out.append(oldest_first[start:start + n][::-1])
+        start += n
+    return out
+
+
+async def run_scenario(name, history, script, burst_poll, recovery_failures=0, max_overfetch=None,
+                       api_max_depth=None, max_requests=None):
+    published = [t for step in script if isinstance(step, list) for t in step]
+    with tempfile.TemporaryDirectory() as tmp:
+        service = ScriptedService(os.path.join(tmp, "gap.db"), list(history), script,
+                                  recovery_failures, api_max_depth)
+        try:
+            await service.poll_trades(lambda trade: asyncio.sleep(0), interval=0)
+        finally:
+            await service.close()
+
+    processed = service.aggregated - len(history)
+    newest = max(t['timestamp'] for t in published)
+    page_limit, requests, fetched = service.polls[burst_poll]
+    missing = len(script[burst_poll - 1])
+    problems = []
+    # With a depth limit, the trades the API refuses to serve are written off
+    servable = min(len(published), api_max_depth or len(published))
+    if processed > len(published) or processed < servable - MIN_PAGE_LIMIT or (
+            processed < len(published) and not api_max_depth):
+        problems.append(f"{processed} of {len(published)} new trades processed")
+    if service.last_timestamp != newest:
+        problems.append(f"watermark at {service.last_timestamp}, newest trade {newest}")
+    budget = max_overfetch * missing + page_limit if max_overfetch else None
+    if budget is not None and fetched > budget:
+        problems.append(f"recovery poll downloaded {fetched} trades for {missing} new (budget {budget})")
+    if max_requests is not None and requests > max_requests:
+        problems.append(f"recovery poll made {requests} requests (at most {max_requests})")
+
+    print(f"{name}: {processed} of {len(published)} new trades processed; recovery poll "
+          f"(page_limit {page_limit}) made {requests} requests for {fetched} trades")
+    return [f"{name}: {line}" for line in problems]
+
+
+async def check(args):
+    now = int(time.time())
+
+    # Outage: history, failed polls, then a burst
+    old = generate_trades('normal', seed=args.seed, trades=args.history, end_ts=now - 600)
+    burst = generate_trades('sports_night', seed=args.seed + 1, trades=args.burst, end_ts=now)
+    script = ["fail"] * args.failures + [burst] + ["ok"] * args.catch_up
+    problems = await run_scenario("outage", old, script, args.failures + 1,
+                                  args.recovery_failures, args.max_overfetch)
+
+    # Routine: steady polls settle page_limit, then one burst just past it
+    settle = 10
+    stream = generate_trades('normal', seed=args.seed + 2,
+                             trades=args.history + settle * args.steady + args.routine_burst, end_ts=now)
+    parts = batches(stream, [args.history] + [args.steady] * settle + [args.routine_burst])
+    script = parts[1:] + ["ok"] * args.catch_up
+    problems += await run_scenario("routine", parts[0], script, settle + 1, 0, args.max_overfetch)
+
+    # Long outage: a known arrival rate sizes recovery to one wave
+    stream = generate_trades('normal', seed=args.seed + 4,
+                             trades=args.history + settle * args.outage_steady + args.long_burst, end_ts=now)
+    parts = batches(stream, [args.history] + [args.outage_steady] * settle + [args.long_burst])
+    script = parts[1:-1] + ["fail"] * args.failures + parts[-1:] + ["ok"] * args.catch_up
+    problems += await run_scenario("long outage", parts[0], script, settle + args.failures + 1, 0,
+                                   args.max_overfetch, max_requests=1 + GAP_FETCH_CONCURRENCY)
+
+    # Refused depth: the burst reaches past what the API will serve
+    deep = generate_trades('sports_night', seed=args.seed + 3, trades=args.deep_burst, end_ts=now)
+    script = [deep] + ["ok"] * (GAP_MAX_UNRECOVERED_POLLS + args.catch_up)
+    problems += await run_scenario("refused depth", old, script, 1, api_max_depth=args.api_max_depth)
+
+    for line in problems:
+        print(f"PROBLEM {line}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=2000, help="trades loaded before the outage")
+    parser.add_argument("--failures", type=int, default=10, help="failed polls in a row")
+    parser.add_argument("--burst", type=int, default=1500, help="trades published right after the outage")
+    parser.add_argument("--recovery-failures", type=int, default=2, help="failed requests for deeper pages")
+    parser.add_argument("--steady", type=int, default=20, help="trades per poll before the routine burst")
+    parser.add_argument("--routine-burst", type=int, default=150, help="trades published in the routine burst poll")
+    parser.add_argument("--outage-steady", type=int, default=130,
+                        help="trades per poll before the long outage (about 3s of 'normal' traffic)")
+    parser.add_argument("--long-burst", type=int, default=50000, help="trades published during the long outage")
+    parser.add_argument("--deep-burst", type=int, default=30000, help="trades published in the refused-depth poll")
+    parser.add_argument("--api-max-depth", type=int, default=20000, help="deepest offset+limit the API serves")
+    parser.add_argument("--catch-up", type=int, default=2, help="normal polls after each burst")
+    parser.add_argument("--max-overfetch", type=float, default=4.0,
+                        help="trades the recovery poll may download per missing trade, plus one page")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(check(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Check that the fast dedup-key path produces the same keys as the Decimal one.
+
+    python -m benchmarks.check_key_equivalence --trades 200000
+
+Compares the memoized TradePersistence._normalize_number with
+_normalize_decimal, and raw_key with the original pipe-joined form, over edge
+cases and a synthetic corpus, with both cold and warm caches. Exits non-zero
+if anything differs.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.synthetic import generate_trades
+from services.polymarket import TradePersistence
+
+EDGE_CASES = [
+    0, 1, -1, 0.0, -0.0, 1.0, 0.5, 0.1, 0.01, 1e-7, 5e-7, 1.5e-6, 2.5e-6, 123456.789,
+    1e15, 1e16, 1e20, 1e21, 1e22, 1e30, 1e-5, 12345678901234567890, 123456789012345678901,
+    float('nan'), float('inf'), float('-inf'), True, False, None,
+    "", " ", "0", "00", "-0", "0.", ".5", "5.", "+1", "1e3", "1E-7", "1_000",
+    " 1.5", "1.5 ", "abc", "NaN", "-Infinity", "0x10", "١٢", "1.2.3", "--1",
+    "0.0000005", "0.0000015", "0.0000025", "0.00000050", "0.00000051", "0.0000004999",
+    "0.9999995", "0.9999994", "9.9999995", "-0.0000005", "-0.0000006", "-9.9999995",
+    "00001.25", "0000.0000001", "99999999999999999999.9999995", "999999999999999999999.5",
+    "1234567890123456789012.5", "0.123456789012345678901234567890",
+    # Equal values of different types share a cache slot
+    10 ** 16, 10 ** 22, 1, 1.0, True, "1", 0, -0.0, 0.0, "-0.0", 2, 2.0, 0.5, "0.5", 0.50,
+    # ...but an int and an equal float need not normalize the same
+    2 ** 60, float(2 ** 60), float(10 ** 23), 10 ** 23,
+]
+
+
+def _reference_key(persistence, trade):
+    """raw_key as it was before the fast path."""
+    price = persistence._normalize_decimal(trade.get('price', 0))
+    size = persistence._normalize_decimal(trade.get('size', 0))
+    try:
+        ts = int(trade.get('timestamp', 0))
+    except:
+        ts = 0
+    parts = [
+        trade.get('proxyWallet', ''),
+        trade.get('conditionId', ''),
+        trade.get('side', ''),
+        trade.get('outcomeIndex', ''),
+        price,
+        size,
+        ts,
+        trade.get('transactionHash', ''),
+    ]
+    return "|".join(str(p) for p in parts)
+
+
+def _random_numbers(rng, count):
+    """Numeric strings and floats around the rounding boundary."""
+    for _ in range(count):
+        whole = str(rng.randrange(10 ** rng.randint(0, 8)))
+        frac = ''.join(rng.choice('0123456789') for _ in range(rng.randint(0, 12)))
+        if rng.random() < 0.3:
+            frac = frac[:6].ljust(6, '0') + '5' + '0' * rng.randint(0, 3)
+        sign = '-' if rng.random() < 0.1 else ''
+        text = f"{sign}{whole}.{frac}" if frac or rng.random() < 0.5 else f"{sign}{whole}"
+        yield text
+        yield float(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=100000, help="synthetic trades to compare")
+    parser.add_argument("--numbers", type=int, default=200000, help="random numeric values to compare")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    mismatches = []
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence = TradePersistence(os.path.join(tmp, "check.db"))
+        try:
+            rng = random.Random(args.seed)
+            values = EDGE_CASES + list(_random_numbers(rng, args.numbers))
+            values += values  # second pass hits the cache
+            for val in values:
+                expected, actual = persistence._normalize_decimal(val), persistence._normalize_number(val)
+                if expected != actual:
+                    mismatches.append(f"value {val!r}: {actual!r} != {expected!r}")
+
+            trades = generate_trades('normal', seed=args.seed, trades=args.trades)
+            # API responses carry numbers as JSON numbers; some clients see strings
+            trades += [dict(t, price=str(t['price']), size=str(t['size'])) for t in trades[:1000]]
+            trades += [{}, {'price': None, 'size': 'x', 'timestamp': 'bad'}]
+            for trade in trades:
+                expected, actual = _reference_key(persistence, trade), persistence.raw_key(trade)
+                if expected != actual:
+                    mismatches.append(f"key {actual!r} != {expected!r}")
+        finally:
+            persistence.close()
+
+    for line in mismatches[:20]:
+        print(f"MISMATCH {line}", file=sys.stderr)
+    print(f"Compared {len(values)} values and {len(trades)} trades: {len(mismatches)} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Check MarketStream against a local stand-in market channel.
+
+    python -m benchmarks.check_market_stream
+
+Runs MarketStream (with short quiet and heartbeat intervals) against
+benchmarks.fake_market_ws and a stand-in poller, through three phases:
+
+- subscribe: the tracked assets are subscribed on connect, assets the
+  poller starts tracking later are added, and a trade wakes the poller and
+  marks the stream active (push_active).
+- quiet fallback: with heartbeats still answered but no trades, push_active
+  must drop within the quiet window and the poller must be woken. An asset
+  the poller stops tracking must be unsubscribed.
+- reconnect-resume: after the server drops the connection the poller is
+  woken at once, the stream reconnects and resubscribes every tracked
+  asset, and the next trade makes it active again.
+
+Exits non-zero if any phase fails.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from collections import OrderedDict
+
+from benchmarks.fake_market_ws import FakeMarketWS
+from services.polymarket_ws import MarketStream
+
+
+class StandInPoller:
+    """The parts of PolymarketService that MarketStream uses."""
+
+    def __init__(self, assets):
+        self.active_assets = OrderedDict((a, 0) for a in assets)
+        self.push_active = False
+        self.wakes = 0
+
+    def wake(self):
+        self.wakes += 1
+
+
+async def wait_for(condition, timeout):
+    """Poll `condition` until it holds; returns whether it did within `timeout`."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        await asyncio.sleep(0.02)
+    return condition()
+
+
+async def check(args):
+    server = FakeMarketWS()
+    url = await server.start()
+    poller = StandInPoller(["asset-a", "asset-b"])
+    stream = MarketStream(poller, url=url, quiet_sec=args.quiet, ping_interval=args.ping)
+    task = asyncio.create_task(stream.run())
+    problems = []
+
+    try:
+        # Subscribe
+        if not await wait_for(lambda: server.subscribed == {"asset-a", "asset-b"}, 5):
+            problems.append(f"initial subscription: {server.subscriptions}")
+        poller.active_assets["asset-c"] = 0
+        await server.publish_trade("asset-a")
+        if not await wait_for(lambda: poller.push_active and poller.wakes >= 1, 2):
+            problems.append("trade event did not wake the poller and activate push")
+        if not await wait_for(lambda: "asset-c" in server.subscribed, 2):
+            problems.append("newly tracked asset was not subscribed")
+
+        # Quiet fallback: only heartbeats from here on
+        wakes = poller.wakes
+        went_quiet = await wait_for(lambda: not poller.push_active, args.quiet + 1)
+        pings = server.pings
+        if not went_quiet:
+            problems.append(f"push_active still set {args.quiet + 1:.1f}s after the last trade")
+        elif poller.wakes == wakes:
+            problems.append("going quiet did not wake the poller")
+        if not pings:
+            problems.append("no heartbeat reached the server during the quiet phase")
+        del poller.active_assets["asset-c"]
+        if not await wait_for(lambda: "asset-c" not in server.subscribed, 2):
+            problems.append("asset no longer tracked was not unsubscribed")
+        poller.active_assets["asset-c"] = 0
+
+        # Reconnect-resume
+        await server.publish_trade("asset-b")
+        await wait_for(lambda: poller.push_active, 2)
+        wakes = poller.wakes
+        await server.drop_connections()
+        if not await wait_for(lambda: not poller.push_active and poller.wakes > wakes, 2):
+            problems.append("disconnect did not restore polling and wake the poller")
+        if not await wait_for(lambda: server.connections == 2 and len(server.clients) == 1, 5):
+            problems.append("stream did not reconnect")
+        resubscribed = {a for n, assets in server.subscriptions if n == 2 for a in assets}
+        if resubscribed != {"asset-a", "asset-b", "asset-c"}:
+            problems.append(f"resubscribed {sorted(resubscribed)} after reconnect")
+        await server.publish_trade("asset-c")
+        if not await wait_for(lambda: poller.push_active, 2):
+            problems.append("trade after reconnect did not activate push")
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await server.stop()
+
+    print(f"Stream: {stream.get_stats()}")
+    print(f"Server: {server.get_stats()}")
+    for line in problems:
+        print(f"PROBLEM {line}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quiet", type=float, default=1.0, help="quiet window in seconds")
+    parser.add_argument("--ping", type=float, default=0.2, help="heartbeat interval in seconds")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(check(args)))
+
+
+if __name__ == "__main__":
+    main()
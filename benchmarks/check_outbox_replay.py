@@ -0,0 +1,99 @@
+"""
+Check that the outbox journal carries undelivered messages across a restart.
+
+    python -m benchmarks.check_outbox_replay --messages 400
+
+Submits alerts of every tier to a DeliveryEngine with a journal, stops it
+before the backlog drains (as a deploy would), then starts a fresh engine on
+the same journal. Every message must be delivered exactly once across both
+runs, except low-tier alerts that outlived their TTL, which must be dropped.
+Exits non-zero otherwise.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:benchmark")
+
+from config import FILTERS  # noqa: E402
+from services.outbox import OutboxJournal  # noqa: E402
+from services.telegram_service import DeliveryEngine  # noqa: E402
+
+SEND_LATENCY = 0.01  # seconds per simulated sendMessage
+
+
+def journaled(path):
+    journal = OutboxJournal(path)
+    journal.close()
+    return len(journal.take_pending())
+
+
+async def run_engine(path, delivered, submit=(), ttl=None, timeout=None, rate=200):
+    async def send(chat_id, text):
+        await asyncio.sleep(SEND_LATENCY)
+        delivered.append(text)
+
+    engine = DeliveryEngine(send, global_rate=rate, ttl=ttl or {})
+    engine.start(journal=OutboxJournal(path))
+    for chat_id, text, level in submit:
+        await engine.submit(chat_id, text, level)
+    await engine.close(timeout=timeout if timeout is not None else 600)
+    return engine.get_stats()
+
+
+async def check(args):
+    rng = random.Random(args.seed)
+    levels = [f['min'] for f in FILTERS]
+    messages = [(rng.randint(1, args.chats), f"m{i}", rng.choice(levels)) for i in range(args.messages)]
+    ttl = {500: args.ttl}  # only SHRIMP alerts can go stale
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "outbox.db")
+        first, second = [], []
+        # Per-chat limits (1/s) keep most of the backlog pending when the first run stops
+        await run_engine(path, first, submit=messages, ttl=ttl, timeout=args.stop_after)
+        leftover = journaled(path)
+        time.sleep(args.ttl + 0.1)  # the "deploy" takes longer than the SHRIMP TTL
+        stats2 = await run_engine(path, second, ttl=ttl)
+        remaining = journaled(path)
+
+    sent = first + second
+    expected = {text for _, text, _ in messages}
+    shrimp = {text for _, text, level in messages if level == 500}
+    delivered = set(sent)
+    problems = []
+    if len(sent) != len(delivered):
+        problems.append(f"{len(sent) - len(delivered)} duplicate deliveries")
+    lost = expected - delivered - shrimp
+    if lost:
+        problems.append(f"{len(lost)} non-SHRIMP messages never delivered")
+    late_shrimp = shrimp & set(second)
+    if late_shrimp:
+        problems.append(f"{len(late_shrimp)} stale SHRIMP alerts delivered after restart")
+    if remaining:
+        problems.append(f"{remaining} rows left in the journal")
+
+    print(f"First run: {len(first)} delivered, {leftover} journaled at stop")
+    print(f"Second run: {len(second)} delivered, {stats2['expired']} expired on replay")
+    for line in problems:
+        print(f"PROBLEM {line}", file=sys.stderr)
+    return 1 if problems or not leftover else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=400)
+    parser.add_argument("--chats", type=int, default=40)
+    parser.add_argument("--stop-after", type=float, default=1.5, help="seconds before the first run stops")
+    parser.add_argument("--ttl", type=float, default=1.0, help="SHRIMP alert TTL in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(check(args)))
+
+
+if __name__ == "__main__":
+    main()
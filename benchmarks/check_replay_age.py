@@ -0,0 +1,112 @@
+"""
+Check that replaying a recording gives the same alerts however old it is.
+
+    python -m benchmarks.check_replay_age --age-hours 2
+
+Writes the same synthetic traffic as two recordings, one ending now and one
+ending --age-hours ago, replays both through ReplayService as fast as
+possible with aggregator cleanup after every poll (as a 1x replay would
+get), and compares the alerts (timestamps aside) and the series a
+snapshot of the final aggregator state restores. The traffic spans more
+than the longest aggregation window, so series expiry is exercised.
+Exits non-zero if the two runs differ.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from benchmarks.synthetic import generate_trades
+from services.aggregator import TradeAggregator
+from services.replay import RECORDING_SUFFIX, ReplayService
+
+
+def write_recording(directory, trades, poll_sec, page_sec):
+    """One recorded poll every `poll_sec` of trade time, each holding the last `page_sec` of trades."""
+    oldest_first = trades[::-1]
+    start, end = oldest_first[0]['timestamp'], oldest_first[-1]['timestamp']
+    polls = 0
+    t = start + poll_sec
+    while t < end + poll_sec:
+        page = [trade for trade in trades if t - page_sec < trade['timestamp'] <= t]
+        name = f"{t * 1000}_0_{max(len(page), 1)}{RECORDING_SUFFIX}"
+        with gzip.open(os.path.join(directory, name), 'wb') as f:
+            f.write(json.dumps(page).encode())
+        polls += 1
+        t += poll_sec
+    return polls
+
+
+class EagerCleanupReplay(ReplayService):
+    """ReplayService whose aggregator cleanup is due after every poll."""
+
+    async def _wait_next_poll(self, interval):
+        self.aggregator.last_cleanup = float('-inf')
+        await super()._wait_next_poll(interval)
+
+
+async def replay(trades, poll_sec, page_sec):
+    """Alerts (without timestamps) and the restored series count of one replay."""
+    alerts = []
+
+    async def on_alert(trade):
+        alerts.append(tuple(sorted(
+            (k, v) for k, v in trade.items() if k != 'timestamp' and not isinstance(v, list)
+        )))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recording = os.path.join(tmp, "recording")
+        os.makedirs(recording)
+        write_recording(recording, trades, poll_sec, page_sec)
+        service = EagerCleanupReplay(recording, db_path=os.path.join(tmp, "replay.db"), speed=0)
+        try:
+            await service.poll_trades(on_alert)
+            state = service.aggregator.snapshot()
+        finally:
+            await service.close()
+    return alerts, TradeAggregator().restore(state)
+
+
+def shifted(trades, seconds):
+    return [dict(trade, timestamp=trade['timestamp'] - seconds) for trade in trades]
+
+
+async def check(args):
+    trades = generate_trades('quiet', seed=args.seed, trades=args.trades, rate=args.rate)
+    span = trades[0]['timestamp'] - trades[-1]['timestamp']
+    fresh_alerts, fresh_restored = await replay(trades, args.poll_sec, args.page_sec)
+    old_alerts, old_restored = await replay(shifted(trades, int(args.age_hours * 3600)),
+                                            args.poll_sec, args.page_sec)
+
+    print(f"{len(trades)} trades over {span / 3600:.1f}h: fresh recording {len(fresh_alerts)} alerts, "
+          f"{fresh_restored} series restored; {args.age_hours}h old {len(old_alerts)} alerts, "
+          f"{old_restored} series restored")
+    problems = []
+    if fresh_alerts != old_alerts:
+        problems.append(f"alerts differ ({len(fresh_alerts)} vs {len(old_alerts)})")
+    if fresh_restored != old_restored:
+        problems.append(f"restored series differ ({fresh_restored} vs {old_restored})")
+    for line in problems:
+        print(f"PROBLEM {line}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=15000)
+    parser.add_argument("--rate", type=float, default=2, help="trades per second outside bursts")
+    parser.add_argument("--age-hours", type=float, default=2, help="age of the second recording")
+    parser.add_argument("--poll-sec", type=int, default=30, help="trade time between recorded polls")
+    parser.add_argument("--page-sec", type=int, default=60, help="trade time each recorded page covers")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(check(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Local stand-in for the Telegram Bot API, for exercising delivery offline.
+
+    python -m benchmarks.fake_bot_api --port 8081
+    TELEGRAM_API_URL=http://127.0.0.1:8081 python main.py
+
+Implements sendMessage (and getMe) with Telegram's flood limits: about 30
+messages/sec overall, 1/sec per private chat and 20/min per group (negative
+chat id). Requests over a limit get the real 429 response with
+parameters.retry_after, so aiogram raises TelegramRetryAfter. Every accepted
+message is recorded for ordering and loss checks.
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import deque
+
+from aiohttp import web
+
+GLOBAL_RATE = 30  # messages/sec
+PRIVATE_INTERVAL = 1.0  # seconds between messages to one user
+GROUP_PER_MINUTE = 20
+TIMING_SLACK = 0.9  # accept gaps this fraction of the nominal interval (clock jitter)
+
+
+class FakeBotAPI:
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0, seed=42,
+                 global_rate=GLOBAL_RATE, private_interval=PRIVATE_INTERVAL, group_per_minute=GROUP_PER_MINUTE):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate  # share of requests answered with a 502
+        self.rng = random.Random(seed)
+        self.global_rate = global_rate
+        self.private_interval = private_interval
+        self.group_per_minute = group_per_minute
+        self.global_window = deque()  # accept times in the last second
+        self.chat_windows = {}  # chat_id -> deque of accept times
+        self.accepted = []  # (accepted_at, chat_id, text)
+        self.flood_rejects = 0
+        self.server_errors = 0
+        self.message_id = 0
+        self.runner = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/bot{token}/{method}", self.handle)
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Serve in the current loop; returns the base URL for TELEGRAM_API_URL."""
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def _flood_wait(self, chat_id, now):
+        """Seconds the caller must wait, or 0 if the message may be accepted now."""
+        while self.global_window and now - self.global_window[0] >= 1.0:
+            self.global_window.popleft()
+        if len(self.global_window) >= self.global_rate:
+            return 1.0 - (now - self.global_window[0])
+
+        window = self.chat_windows.setdefault(chat_id, deque())
+        if chat_id < 0:
+            while window and now - window[0] >= 60.0:
+                window.popleft()
+            if len(window) >= self.group_per_minute:
+                return 60.0 - (now - window[0])
+        if window and now - window[-1] < self.private_interval * TIMING_SLACK:
+            return self.private_interval - (now - window[-1])
+        return 0
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        data = await request.post()
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+
+        if method == "getMe":
+            return web.json_response({"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}})
+        if method != "sendMessage":
+            return web.json_response({"ok": False, "error_code": 404, "description": "Not Found"}, status=404)
+
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.server_errors += 1
+            return web.json_response({"ok": False, "error_code": 502, "description": "Bad Gateway"}, status=502)
+
+        chat_id = int(data["chat_id"])
+        now = time.monotonic()
+        wait = self._flood_wait(chat_id, now)
+        if wait > 0:
+            self.flood_rejects += 1
+            retry_after = max(1, math.ceil(wait))
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            }, status=429)
+
+        self.global_window.append(now)
+        self.chat_windows[chat_id].append(now)
+        self.accepted.append((now, chat_id, data["text"]))
+        self.message_id += 1
+        return web.json_response({"ok": True, "result": {
+            "message_id": self.message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "group" if chat_id < 0 else "private"},
+            "text": data["text"],
+        }})
+
+    def get_stats(self):
+        return {
+            "accepted": len(self.accepted),
+            "flood_rejects": self.flood_rejects,
+            "server_errors": self.server_errors,
+        }
+
+
+async def _serve(args):
+    server = FakeBotAPI(latency=args.latency_ms / 1000, error_rate=args.error_rate)
+    url = await server.start(args.host, args.port)
+    print(f"Fake Bot API listening on {url}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(server.get_stats())
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 502")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Local stand-in for the CLOB market WebSocket channel, for exercising push ingest offline.
+
+    python -m benchmarks.fake_market_ws --port 8082 --trade-interval 2
+    MARKET_WS_URL=ws://127.0.0.1:8082 INGEST_MODE=ws python main.py
+
+Answers the text PING heartbeat with PONG and records every subscription
+(the initial {"type": "market"} message and later "subscribe" operations);
+"unsubscribe" operations remove assets again.
+Trades are published as last_trade_price events on subscribed assets, either
+on demand (publish_trade) or every --trade-interval seconds; 0 publishes
+nothing, so the socket stays up with only heartbeats. drop_connections()
+closes every client, as a server restart would.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+
+class FakeMarketWS:
+    def __init__(self, seed=42):
+        self.rng = random.Random(seed)
+        self.clients = {}  # connection -> set of subscribed asset ids
+        self.subscriptions = []  # (connection number, [asset ids]) in arrival order
+        self.connections = 0
+        self.pings = 0
+        self.trades_published = 0
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Serve in the current loop; returns the ws:// URL for MARKET_WS_URL."""
+        self.server = await serve(self.handle, host, port)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"ws://{host}:{port}"
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def handle(self, ws):
+        self.connections += 1
+        number = self.connections
+        self.clients[ws] = set()
+        try:
+            async for raw in ws:
+                if raw == "PING":
+                    self.pings += 1
+                    await ws.send("PONG")
+                    continue
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                if message.get("type") == "market" or message.get("operation") == "subscribe":
+                    assets = list(message.get("assets_ids", []))
+                    self.subscriptions.append((number, assets))
+                    self.clients[ws].update(assets)
+                elif message.get("operation") == "unsubscribe":
+                    self.clients[ws].difference_update(message.get("assets_ids", []))
+        except ConnectionClosed:
+            pass
+        finally:
+            self.clients.pop(ws, None)
+
+    @property
+    def subscribed(self):
+        """Asset ids subscribed on any open connection."""
+        return set().union(*self.clients.values()) if self.clients else set()
+
+    async def publish_trade(self, asset_id, price=0.5, size=100.0):
+        """Send a last_trade_price event to every client subscribed to asset_id."""
+        event = json.dumps({
+            "event_type": "last_trade_price",
+            "asset_id": asset_id,
+            "price": str(price),
+            "size": str(size),
+            "side": "BUY",
+            "timestamp": str(int(time.time() * 1000)),
+        })
+        for ws, assets in list(self.clients.items()):
+            if asset_id in assets:
+                try:
+                    await ws.send(event)
+                except ConnectionClosed:
+                    continue
+                self.trades_published += 1
+
+    async def drop_connections(self):
+        """Close every client connection."""
+        for ws in list(self.clients):
+            await ws.close(code=1012, reason="service restart")
+
+    def get_stats(self):
+        return {
+            "connections": self.connections,
+            "open_connections": len(self.clients),
+            "subscribed_assets": len(self.subscribed),
+            "pings": self.pings,
+            "trades_published": self.trades_published,
+        }
+
+
+async def _serve(args):
+    server = FakeMarketWS()
+    url = await server.start(args.host, args.port)
+    print(f"Fake market channel listening on {url}")
+    last_report = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(args.trade_interval or 10)
+            assets = sorted(server.subscribed)
+            if args.trade_interval and assets:
+                await server.publish_trade(server.rng.choice(assets), price=round(server.rng.uniform(0.02, 0.98), 3))
+            if time.monotonic() - last_report >= 10:
+                last_report = time.monotonic()
+                print(server.get_stats())
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--trade-interval", type=float, default=2.0, help="seconds between trades, 0 = heartbeats only")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Synthetic Data API trade streams for benchmarking."""
+import math
+import random
+import time
+
+from config import FILTERS
+
+# Stream shapes: markets/wallets in play, fill-size distribution, burstiness
+PROFILES = {
+    'quiet': {
+        'trades': 5000, 'markets': 200, 'wallets': 1000,
+        'usd_mu': 3.5, 'usd_sigma': 1.2,  # lognormal fill size in USD (median ~$33)
+        'burstiness': 0.2,  # probability the next trade continues an open order
+        'rate': 5,  # trades per second outside bursts
+        'subscribers': 200,
+    },
+    'normal': {
+        'trades': 20000, 'markets': 1000, 'wallets': 5000,
+        'usd_mu': 3.8, 'usd_sigma': 1.4,
+        'burstiness': 0.4, 'rate': 30,
+        'subscribers': 1000,
+    },
+    'sports_night': {
+        'trades': 50000, 'markets': 3000, 'wallets': 20000,
+        'usd_mu': 4.2, 'usd_sigma': 1.6,
+        'burstiness': 0.7, 'rate': 150,
+        'subscribers': 5000,
+    },
+}
+
+_TITLES = {
+    'crypto': ["Will Bitcoin reach ${n}k by Friday?", "ETH above ${n}00 on {day}?", "Solana up or down {day}?"],
+    'sports': ["Lakers vs Celtics - {day}", "Will Arsenal win on {day}?", "NFL: Chiefs vs Eagles ({n})"],
+    'other': ["Will the Fed cut rates in {day}?", "Who will win the {n} election?", "Will it rain in NYC on {day}?"],
+}
+_DAYS = ["Monday", "Tuesday", "Friday", "March", "June", "December"]
+
+
+def _hex(rng, nbytes):
+    return '0x' + ''.join(f"{rng.getrandbits(8):02x}" for _ in range(nbytes))
+
+
+def make_markets(rng, count):
+    markets = []
+    for i in range(count):
+        category = rng.choice(list(_TITLES))
+        title = rng.choice(_TITLES[category]).format(n=rng.randint(1, 99), day=rng.choice(_DAYS))
+        slug = title.lower().replace(' ', '-').replace('?', '')[:60]
+        markets.append({
+            'conditionId': _hex(rng, 32),
+            'assets': [str(rng.getrandbits(252)), str(rng.getrandbits(252))],
+            'title': title,
+            'slug': f"{slug}-{i}",
+            'eventSlug': slug,
+            'icon': f"https://polymarket-upload.s3.amazonaws.com/{slug}.png",
+        })
+    return markets
+
+
+def make_wallets(rng, count):
+    return [
+        {'proxyWallet': _hex(rng, 20), 'name': f"trader{i}", 'pseudonym': f"Anon-{i}"}
+        for i in range(count)
+    ]
+
+
+def generate_trades(profile='normal', seed=42, end_ts=None, **overrides):
+    """
+    Return a list of API-shaped trade dicts, newest first like /trades.
+
+    With probability `burstiness` a trade continues an open order (same
+    wallet, market, side and outcome a few seconds later), which is what the
+    aggregator has to stitch back together; otherwise a new order starts.
+    The stream ends at `end_ts` (default: now), so wall-clock based cleanup
+    in the aggregator sees it as live traffic.
+    """
+    params = dict(PROFILES[profile], **overrides)
+    rng = random.Random(seed)
+    markets = make_markets(rng, params['markets'])
+    wallets = make_wallets(rng, params['wallets'])
+
+    trades = []
+    ts = 0.0
+    open_orders = []
+    for _ in range(params['trades']):
+        if open_orders and rng.random() < params['burstiness']:
+            wallet, market, side, outcome_index, price = rng.choice(open_orders)
+            ts += rng.expovariate(params['rate'] * 4)
+            price = min(0.99, max(0.01, price + rng.uniform(-0.005, 0.005)))
+        else:
+            wallet = rng.choice(wallets)
+            market = rng.choice(markets)
+            side = 'BUY' if rng.random() < 0.7 else 'SELL'
+            outcome_index = rng.randint(0, 1)
+            price = round(rng.uniform(0.02, 0.98), 3)
+            open_orders.append((wallet, market, side, outcome_index, price))
+            if len(open_orders) > 200:
+                open_orders.pop(0)
+            ts += rng.expovariate(params['rate'])
+
+        usd = max(10.0, math.exp(rng.gauss(params['usd_mu'], params['usd_sigma'])))
+        trades.append({
+            'proxyWallet': wallet['proxyWallet'],
+            'side': side,
+            'asset': market['assets'][outcome_index],
+            'conditionId': market['conditionId'],
+            'size': round(usd / price, 6),
+            'price': round(price, 4),
+            'timestamp': int(ts),
+            'title': market['title'],
+            'slug': market['slug'],
+            'icon': market['icon'],
+            'eventSlug': market['eventSlug'],
+            'outcome': 'Yes' if outcome_index == 0 else 'No',
+            'outcomeIndex': outcome_index,
+            'name': wallet['name'],
+            'pseudonym': wallet['pseudonym'],
+            'bio': '',
+            'profileImage': '',
+            'transactionHash': _hex(rng, 32),
+        })
+
+    shift = int(end_ts if end_ts is not None else time.time()) - int(ts)
+    for trade in trades:
+        trade['timestamp'] += shift
+
+    trades.reverse()
+    return trades
+
+
+def generate_subscribers(count, seed=42):
+    """Return {chat_id: settings} shaped like telegram_service's per-user dicts."""
+    rng = random.Random(seed)
+    thresholds = [f['min'] for f in FILTERS]
+    subscribers = {}
+    for i in range(count):
+        # Low tiers are the most popular
+        threshold = thresholds[-1 - min(len(thresholds) - 1, int(rng.expovariate(0.6)))]
+        subscribers[100000 + i] = {
+            'filter': threshold,
+            'categories': {
+                'all': False,
+                'other': rng.random() < 0.8,
+                'crypto': rng.random() < 0.7,
+                'sports': rng.random() < 0.6,
+            },
+            'language': 'en' if rng.random() < 0.4 else 'ru',
+            'status': rng.random() < 0.9,
+            'probability': rng.choice(['any', 'any', '1_99', '5_95', '10_90']),
+        }
+    return subscribers
@@ -6,6 +6,8 @@ load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 # We will start with a placeholder, but in main.py we might ask user or just print it.
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID") 
+# Bot API server; set to a local stand-in (benchmarks/fake_bot_api.py) for testing
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
 
 # Polymarket CLOB API credentials
 POLY_API_KEY = os.getenv("POLY_API_KEY")
@@ -22,6 +24,14 @@ WS_URL = "wss://ws-gamma-clob.polymarket.com/" # Gamma is usually testnet, CLOB
 # Production WS: wss://ws-clob.polymarket.com/ws (check docs, usually /ws or just root)
 # Found correct host via nslookup: ws-subscriptions-clob.polymarket.com
 PROD_WS_URL = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+# Market channel for push ingest; set to a local stand-in (benchmarks/fake_market_ws.py) for testing
+MARKET_WS_URL = os.getenv("MARKET_WS_URL", PROD_WS_URL)
+
+# Trade ingest: "poll" (Data API only) or "ws" (market channel push + polling fallback)
+INGEST_MODE = os.getenv("INGEST_MODE", "poll").lower()
+
+# If set, raw Data API responses are recorded here for replay_traffic.py
+RECORD_DIR = os.getenv("RECORD_DIR")
 
 FILTERS = [
     {"min": 100000, "emoji": "🔥 МЕГА КИТ", "emoji_en": "🔥 MEGA WHALE", "name": "Мега Кит"},
@@ -13,3 +13,14 @@ def get_alert_level(size_usd):
         if size_usd >= f['min']:
             return f
     return None
+
+# Tier thresholds, largest first; the index is the tier's delivery priority
+TIER_ORDER = sorted((f['min'] for f in FILTERS), reverse=True)
+_TIER_PRIORITY = {m: i for i, m in enumerate(TIER_ORDER)}
+
+def get_tier_priority(level):
+    """
+    Delivery priority for an alert tier threshold: 0 for the largest tier.
+    Messages without a known tier sort after every alert.
+    """
+    return _TIER_PRIORITY.get(level, len(TIER_ORDER))
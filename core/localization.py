@@ -9,6 +9,7 @@ TRANSLATIONS = {
         'btn_amount': "💰 Сумма сделки",
         'btn_categories': "📂 Категории",
         'btn_probability': "⚖️ Вероятность",
+        'btn_digest': "📬 Дайджест",
         'btn_start': "▶️ Запустить",
         'btn_stop': "⏸️ Остановить",
         'btn_language': "🇬🇧 EN",
@@ -35,6 +36,14 @@ TRANSLATIONS = {
         'prob_10_90': "🟠 10% — 90%",
         'filter_toast': "Настройки обновлены!",
         
+        # Digest
+        'digest_menu_title': "📬 **Дайджест**\n\nСделки 🦐 и 🐟 можно собирать в одно сообщение.\nБолее крупные сделки всегда приходят сразу.",
+        'digest_off': "🔔 Каждая сделка отдельно",
+        'digest_window': "📬 Раз в {minutes} мин",
+        'digest_set': "✅ Дайджест: мелкие сделки раз в *{minutes} мин*",
+        'digest_set_off': "✅ Дайджест выключен: каждая сделка приходит отдельно",
+        'digest_header': "📬 *Дайджест* — сделок: {count}",
+        
         # Settings
         'settings_title': "⚙️ **Настройки категорий**\n\nВыбери какие рынки отслеживать:",
         'settings_all': "Все сделки",
@@ -92,6 +101,7 @@ TRANSLATIONS = {
         'btn_amount': "💰 Trade Amount",
         'btn_categories': "📂 Categories",
         'btn_probability': "⚖️ Probability",
+        'btn_digest': "📬 Digest",
         'btn_start': "▶️ Start",
         'btn_stop': "⏸️ Stop",
         'btn_language': "🇷🇺 RU",
@@ -117,6 +127,14 @@ TRANSLATIONS = {
         'prob_5_95': "🟡 5% — 95%",
         'prob_10_90': "🟠 10% — 90%",
         
+        # Digest
+        'digest_menu_title': "📬 **Digest**\n\n🦐 and 🐟 trades can be collected into one message.\nLarger trades always arrive immediately.",
+        'digest_off': "🔔 Every trade separately",
+        'digest_window': "📬 Every {minutes} min",
+        'digest_set': "✅ Digest: small trades every *{minutes} min*",
+        'digest_set_off': "✅ Digest off: every trade arrives separately",
+        'digest_header': "📬 *Digest* — {count} trades",
+        
         # Settings
         'settings_title': "⚙️ **Category Settings**\n\nSelect which markets to track:",
         'settings_all': "All trades",
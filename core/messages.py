@@ -0,0 +1,80 @@
+"""Alert message rendering for Telegram."""
+from core.localization import get_trade_level_emoji
+
+# Category emoji shown before the market link
+CATEGORY_EMOJIS = {"crypto": "💰", "sports": "⚽", "other": "📌"}
+
+
+def format_window(seconds):
+    """Aggregation window as shown in alerts: 45s, 5m, 1h."""
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+class AlertMessage:
+    """
+    One trade's alert, rendered at most once per language.
+
+    Everything except the localized tier label is formatted in __init__;
+    text(lang) fills that slot once and caches the string, so every
+    recipient of a language variant gets the same immutable payload.
+    """
+
+    def __init__(self, trade_data, alert_config, category):
+        price = float(trade_data.get('price', 0))
+        size = float(trade_data.get('size', 0))
+        value_usd = price * size
+
+        market_title = trade_data.get('title', 'Unknown Market')
+        side = trade_data.get('side', 'UNKNOWN')
+        outcome = trade_data.get('outcome', '')
+        trader = trade_data.get('name') or trade_data.get('pseudonym', 'Unknown')
+        trader_address = trade_data.get('proxyWallet', '') or trade_data.get('maker', '')
+        event_slug = trade_data.get('eventSlug', '')
+
+        # Color for side + outcome
+        # 🟢 Green = BUY Yes, 🔴 Red = BUY No, 🔵 Blue = SELL
+        if side == "SELL":
+            side_emoji = "🔵"
+        elif outcome.lower() == "yes":
+            side_emoji = "🟢"
+        else:
+            side_emoji = "🔴"
+
+        # Build URLs
+        market_url = f"https://polymarket.com/event/{event_slug}" if event_slug else ""
+        trader_url = f"https://polymarket.com/profile/{trader_address}" if trader_address else ""
+
+        # Money display: BUY shows spent → payout, SELL shows just received amount
+        if side == 'BUY':
+            money_text = f"*${value_usd:,.0f}* → ${size:,.0f}"
+        else:
+            money_text = f"*${value_usd:,.0f}*"
+
+        # Format header based on whether it's a multi-fill series or single trade
+        is_series = trade_data.get('is_aggregate', False) and trade_data.get('series_fills', 1) > 1
+        if is_series:
+            fills = trade_data.get('series_fills', 0)
+            window = format_window(trade_data.get('series_window_sec', 60))
+            side_display = f"⚡ *Series {side} {outcome}* ({fills} fills, {window})"
+        else:
+            side_display = f"{side_emoji} *{side} {outcome}*"
+
+        # Price as percentage (Polymarket prices are 0-1)
+        self.head = (
+            f"{CATEGORY_EMOJIS.get(category, '')} [{market_title[:80]}]({market_url})\n"
+            f"{side_display} @ {price * 100:.1f}%\n"
+            f"💵 {money_text}\n"
+        )
+        self.trader_text = f"[{trader}]({trader_url})" if trader_url else trader
+        self.level = alert_config['min']
+        self.texts = {}  # lang -> rendered text
+
+    def text(self, lang):
+        text = self.texts.get(lang)
+        if text is None:
+            text = self.texts[lang] = f"{self.head}{get_trade_level_emoji(lang, self.level)} {self.trader_text}"
+        return text
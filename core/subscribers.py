@@ -0,0 +1,87 @@
+"""Subscriber routing index for alert fan-out."""
+import bisect
+
+from core.categories import should_show_trade
+
+# Categories detect_category can return
+CATEGORIES = ('crypto', 'sports', 'other')
+
+
+class SubscriberIndex:
+    """
+    Active subscribers bucketed by (threshold, category, probability band).
+
+    A user sits in one bucket per category they want to see; paused users
+    are not indexed at all. match() only opens buckets whose threshold is
+    at or below the trade value and whose band contains the price, so it
+    touches the users who will receive the alert and nobody else.
+    """
+
+    def __init__(self, probability_options):
+        # band key -> (min, max) price range, or None for any price
+        self.band_ranges = dict(probability_options)
+        self.bands = list(self.band_ranges.items())
+        self.buckets = {}  # (threshold, category, band) -> {chat_id: None}
+        self.thresholds = []  # sorted thresholds that have at least one bucket entry
+        self.threshold_users = {}  # threshold -> indexed users at that threshold
+        self.memberships = {}  # chat_id -> (threshold, [bucket keys])
+
+    def __len__(self):
+        return len(self.memberships)
+
+    def update(self, chat_id, threshold, active, categories, band):
+        """(Re)index one user from their current settings."""
+        self.remove(chat_id)
+        if not active:
+            return
+        if self.band_ranges.get(band) is None:
+            band = 'any'  # unknown keys filter nothing, like get_user_probability_filter
+        keys = [(threshold, c, band) for c in CATEGORIES if should_show_trade(c, categories)]
+        for key in keys:
+            self.buckets.setdefault(key, {})[chat_id] = None
+        self.memberships[chat_id] = (threshold, keys)
+        count = self.threshold_users.get(threshold, 0)
+        if count == 0:
+            bisect.insort(self.thresholds, threshold)
+        self.threshold_users[threshold] = count + 1
+
+    def remove(self, chat_id):
+        entry = self.memberships.pop(chat_id, None)
+        if entry is None:
+            return
+        threshold, keys = entry
+        for key in keys:
+            bucket = self.buckets[key]
+            del bucket[chat_id]
+            if not bucket:
+                del self.buckets[key]
+        self.threshold_users[threshold] -= 1
+        if self.threshold_users[threshold] == 0:
+            del self.threshold_users[threshold]
+            self.thresholds.remove(threshold)
+
+    def clear(self):
+        self.buckets.clear()
+        self.thresholds.clear()
+        self.threshold_users.clear()
+        self.memberships.clear()
+
+    def match(self, value_usd, category, price):
+        """Chat ids that should receive a trade of `value_usd` in `category` at `price`."""
+        bands = [key for key, band in self.bands if band is None or band[0] <= price <= band[1]]
+        recipients = []
+        for threshold in self.thresholds:
+            if threshold > value_usd:
+                break
+            for band in bands:
+                bucket = self.buckets.get((threshold, category, band))
+                if bucket:
+                    recipients.extend(bucket)
+        return recipients
+
+    def get_stats(self):
+        return {
+            "users": len(self.memberships),
+            "buckets": len(self.buckets),
+            "thresholds": len(self.thresholds),
+        }
@@ -4,15 +4,18 @@ import os
 import sys
 import fcntl
 from services.polymarket import PolymarketService
+from services.polymarket_ws import MarketStream
+from services.pipeline import AlertPipeline, LoopLagMonitor
+from services.replay import TrafficRecorder
+from services.outbox import OutboxJournal
 from services.telegram_service import (
-    start_telegram, send_trade_alert, user_filters, 
-    get_user_categories, get_default_categories, get_user_lang,
-    get_user_probability_filter
+    start_telegram, send_trade_alert, delivery, digests, runtime_stats, user_filters, subscriber_index,
+    get_user_categories, get_user_lang, get_user_probability_filter
 )
 from core.filters import get_alert_level
 from core.categories import detect_category, should_show_trade
-from core.localization import get_text, get_trade_level_name, get_trade_level_emoji
-from config import FILTERS
+from core.messages import AlertMessage
+from config import FILTERS, INGEST_MODE, RECORD_DIR
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -21,9 +24,36 @@ logger = logging.getLogger(__name__)
 # Default chat ID from env (if set)
 DEFAULT_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
-async def handle_trade(trade_data):
+def default_chat_recipient(value_usd, category, price):
+    """
+    Numeric id of DEFAULT_CHAT_ID if it should get this trade, else None.
+    The default chat is only used when it has no saved filter of its own.
+    """
+    if not DEFAULT_CHAT_ID:
+        return None
+    try:
+        default_id = int(DEFAULT_CHAT_ID)
+    except ValueError:
+        return None
+    # Already covered by the subscriber index
+    if default_id in user_filters:
+        return None
+    if value_usd < FILTERS[-1]['min']:
+        return None
+    if not should_show_trade(category, get_user_categories(default_id)):
+        return None
+    prob_range = get_user_probability_filter(default_id)
+    if prob_range:
+        min_prob, max_prob = prob_range
+        if price < min_prob or price > max_prob:
+            return None  # Price outside probability range
+    return default_id
+
+async def handle_trade(trade_data, send=send_trade_alert):
     """
     Callback for when a trade is received from Data API.
+    Matches subscribers and hands each rendered message to `send(chat_id, text, level)`.
+    Each language variant is rendered once and shared by all its recipients.
     """
     try:
         price = float(trade_data.get('price', 0))
@@ -41,137 +71,19 @@ async def handle_trade(trade_data):
         slug = trade_data.get('slug', '')
         event_slug = trade_data.get('eventSlug', '')
         category = detect_category(market_title, f"{slug} {event_slug}")
-            
-        emoji = alert_config['emoji']
-        side = trade_data.get('side', 'UNKNOWN')
-        outcome = trade_data.get('outcome', '')
-        trader = trade_data.get('name') or trade_data.get('pseudonym', 'Unknown')
-        trader_address = trade_data.get('proxyWallet', '') or trade_data.get('maker', '')
-        event_slug = trade_data.get('eventSlug', '')
-        
-        # Color for side + outcome
-        # 🟢 Green = BUY Yes, 🔴 Red = BUY No, 🔵 Blue = SELL
-        if side == "SELL":
-            side_emoji = "🔵"
-        elif outcome.lower() == "yes":
-            side_emoji = "🟢"
-        else:
-            side_emoji = "🔴"
         
-        # Category emoji
-        cat_emoji = {"crypto": "💰", "sports": "⚽", "other": "📌"}.get(category, "")
+        message = AlertMessage(trade_data, alert_config, category)
+        level = message.level
         
-        # Build URLs
-        market_url = f"https://polymarket.com/event/{event_slug}" if event_slug else ""
-        trader_url = f"https://polymarket.com/profile/{trader_address}" if trader_address else ""
-        
-        # Price as percentage (Polymarket prices are 0-1)
-        price_pct = price * 100
-        
-        # Get all users who should receive this alert
-        for chat_id, min_threshold in user_filters.items():
-            if value_usd >= min_threshold:
-                # Check active status
-                from services.telegram_service import is_user_active
-                if not is_user_active(chat_id):
-                    continue
-
-                # Check category filter
-                user_prefs = get_user_categories(chat_id)
-                if not should_show_trade(category, user_prefs):
-                    continue
-                
-                # Check probability filter
-                prob_range = get_user_probability_filter(chat_id)
-                if prob_range:
-                    min_prob, max_prob = prob_range
-                    if price < min_prob or price > max_prob:
-                        continue  # Price outside user's probability range
-                
-                # Get user's language
-                lang = get_user_lang(chat_id)
-                level_name = get_trade_level_name(lang, alert_config['min'])
-                
-                # Get localized emoji
-                level_emoji = get_trade_level_emoji(lang, alert_config['min'])
-                
-                # Build trader link
-                trader_text = f"[{trader}]({trader_url})" if trader_url else trader
-                
-                # Money display: BUY shows spent → payout, SELL shows just received amount
-                if side == 'BUY':
-                    money_text = f"*${value_usd:,.0f}* → ${size:,.0f}"
-                else:
-                    money_text = f"*${value_usd:,.0f}*"
-                
-                # Format header based on whether it's a multi-fill series or single trade
-                is_series = trade_data.get('is_aggregate', False) and trade_data.get('series_fills', 1) > 1
-                if is_series:
-                    fills = trade_data.get('series_fills', 0)
-                    side_display = f"⚡ *Series {side} {outcome}* ({fills} fills)"
-                else:
-                    side_display = f"{side_emoji} *{side} {outcome}*"
-                    
-                msg = (
-                    f"{cat_emoji} [{market_title[:80]}]({market_url})\n"
-                    f"{side_display} @ {price_pct:.1f}%\n"
-                    f"💵 {money_text}\n"
-                    f"{level_emoji} {trader_text}"
-                )
-                await send_trade_alert(chat_id, msg)
+        # Only the users whose threshold, categories, probability band and
+        # status all admit this trade
+        for chat_id in subscriber_index.match(value_usd, category, price):
+            await send(chat_id, message.text(get_user_lang(chat_id)), level)
         
         # Also send to default chat if set and not already in user_filters
-        if DEFAULT_CHAT_ID:
-            try:
-                default_id = int(DEFAULT_CHAT_ID)
-                # Skip if already sent via user_filters
-                if default_id in user_filters:
-                    return
-                    
-                # Use user's saved threshold if exists, otherwise default to lowest
-                min_threshold = user_filters.get(default_id, FILTERS[-1]['min'])
-                if value_usd >= min_threshold:
-                    # Check category filter for default user
-                    user_prefs = get_user_categories(default_id)
-                    if not should_show_trade(category, user_prefs):
-                        return
-                    
-                    # Check probability filter for default user
-                    prob_range = get_user_probability_filter(default_id)
-                    if prob_range:
-                        min_prob, max_prob = prob_range
-                        if price < min_prob or price > max_prob:
-                            return  # Price outside probability range
-                    
-                    lang = get_user_lang(default_id)
-                    level_name = get_trade_level_name(lang, alert_config['min'])
-                    level_emoji = get_trade_level_emoji(lang, alert_config['min'])
-                    
-                    trader_text = f"[{trader}]({trader_url})" if trader_url else trader
-                    
-                    # Money display: BUY shows spent → payout, SELL shows just received amount
-                    if side == 'BUY':
-                        money_text = f"*${value_usd:,.0f}* → ${size:,.0f}"
-                    else:
-                        money_text = f"*${value_usd:,.0f}*"
-                    
-                    # Format header based on whether it's a multi-fill series or single trade
-                    is_series = trade_data.get('is_aggregate', False) and trade_data.get('series_fills', 1) > 1
-                    if is_series:
-                        fills = trade_data.get('series_fills', 0)
-                        side_display = f"⚡ *Series {side} {outcome}* ({fills} fills)"
-                    else:
-                        side_display = f"{side_emoji} *{side} {outcome}*"
-                    
-                    msg = (
-                        f"{cat_emoji} [{market_title[:80]}]({market_url})\n"
-                        f"{side_display} @ {price_pct:.1f}%\n"
-                        f"💵 {money_text}\n"
-                        f"{level_emoji} {trader_text}"
-                    )
-                    await send_trade_alert(DEFAULT_CHAT_ID, msg)
-            except ValueError:
-                pass
+        default_id = default_chat_recipient(value_usd, category, price)
+        if default_id is not None:
+            await send(DEFAULT_CHAT_ID, message.text(get_user_lang(default_id)), level)
                     
     except Exception as e:
         logger.error(f"Error handling trade: {e}")
@@ -197,14 +109,52 @@ async def main():
     
     # Start Polymarket Service
     poly_service = PolymarketService()
+    if RECORD_DIR:
+        logger.info(f"Recording Data API responses to {RECORD_DIR}")
+        poly_service.recorder = TrafficRecorder(RECORD_DIR)
     
     logger.info("Starting PolyWhales...")
     logger.info("Using Polymarket Data API for whale trades...")
     
-    # Run Polymarket trade polling (uses POLL_INTERVAL from polymarket.py)
-    await poly_service.poll_trades(handle_trade)
+    # Optional push ingest: market channel wakes the poller as trades print
+    ws_task = None
+    if INGEST_MODE == "ws":
+        logger.info("Push ingest enabled (market WebSocket + polling fallback)")
+        stream = MarketStream(poly_service)
+        runtime_stats.add("stream", stream.get_stats)
+        ws_task = asyncio.create_task(stream.run())
     
-    await tg_task
+    # Rate-limited concurrent sender behind send_trade_alert; the journal
+    # replays messages a previous run accepted but did not deliver
+    delivery.start(journal=OutboxJournal())
+    
+    # Alerts flow through bounded queues so Telegram never stalls polling
+    pipeline = AlertPipeline(fanout=handle_trade, deliver=send_trade_alert)
+    pipeline.start()
+    
+    # Report event loop stalls (e.g. blocking I/O on the loop)
+    lag_monitor = LoopLagMonitor()
+    lag_monitor.start()
+    
+    # Owner /stats and a periodic log line report these
+    runtime_stats.add("poller", poly_service.get_stats)
+    runtime_stats.add("pipeline", pipeline.get_stats)
+    runtime_stats.add("loop_lag", lag_monitor.get_stats)
+    runtime_stats.start()
+    
+    # Run Polymarket trade polling (uses POLL_INTERVAL from polymarket.py)
+    try:
+        await poly_service.poll_trades(pipeline.submit)
+        await tg_task
+    finally:
+        if ws_task:
+            ws_task.cancel()
+        await pipeline.close()
+        await digests.close()
+        await delivery.close()
+        await lag_monitor.stop()
+        await runtime_stats.stop()
+        await poly_service.close()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,61 @@
+"""
+Replay recorded Data API traffic through the real pipeline, offline.
+
+Record in production with RECORD_DIR=recordings/<name> set in .env, then:
+
+    python replay_traffic.py recordings/<name> --speed 10
+
+Trades go through PolymarketService (decode, dedup, aggregation) and
+main.handle_trade (category/probability filters, rendering); Telegram
+sending is replaced by a counter.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+# Telegram is never contacted during replay, but the bot module needs a well-formed token
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:replay")
+
+from main import handle_trade  # noqa: E402
+from services.replay import ReplayService  # noqa: E402
+
+logger = logging.getLogger("replay")
+
+
+async def run(directory, speed):
+    stats = {"alerts": 0, "messages": 0}
+    recipients = set()
+
+    async def stub_send(chat_id, text, level=None):
+        stats["messages"] += 1
+        recipients.add(chat_id)
+
+    async def on_alert(trade):
+        stats["alerts"] += 1
+        await handle_trade(trade, send=stub_send)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = ReplayService(directory, db_path=os.path.join(tmp, "replay.db"), speed=speed)
+        start = time.perf_counter()
+        try:
+            await service.poll_trades(on_alert)
+        finally:
+            await service.close()
+        elapsed = time.perf_counter() - start
+
+    logger.info(
+        f"Replayed {service.responses_served} responses in {elapsed:.2f}s: "
+        f"{service.total_trades_processed} new trades, {stats['alerts']} alerts, "
+        f"{stats['messages']} messages to {len(recipients)} chats"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="recording directory written by TrafficRecorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="pace multiplier, 0 = as fast as possible")
+    args = parser.parse_args()
+    asyncio.run(run(args.directory, args.speed))
@@ -0,0 +1,316 @@
+import gc
+import heapq
+import logging
+import os
+import pickle
+import sys
+import time
+from array import array
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Sliding windows as (seconds, alert threshold in USD), shortest first.
+# Series idle this long past the longest window are garbage collected.
+AGGREGATION_WINDOWS = ((60, 500), (300, 2000), (3600, 10000))
+SERIES_IDLE_GRACE = 10
+FILLS_COMPACT_MIN = 64  # expired fills kept before a series' fill log is compacted
+# Series amounts are summed as whole micro-dollars / micro-shares held in
+# floats, which stay exact below 2**53 units (about $9e9 per series)
+AMOUNT_SCALE = 1000000
+SNAPSHOT_VERSION = 2  # 1 = running float sums per window
+# Fields of a series' first fill carried into its alert (see main.handle_trade)
+SERIES_META_FIELDS = (
+    'proxyWallet', 'maker', 'name', 'pseudonym', 'conditionId', 'asset',
+    'title', 'slug', 'eventSlug', 'icon', 'side', 'outcome', 'outcomeIndex', 'timestamp',
+)
+
+
+@contextmanager
+def _gc_paused():
+    """Suspend the cyclic GC while building many containers at once."""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _intern(value):
+    """Share one copy of strings that repeat across trades (wallets, titles)."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class SeriesState:
+    """
+    Sliding totals of one series over every window. `fills` holds flat
+    (ts, cumulative usd, cumulative size) triples; `starts[i]` is window i's oldest fill.
+    """
+    __slots__ = ('last_ts', 'fills', 'starts', 'base_usd', 'base_size', 'alerted', 'meta')
+
+    def __init__(self, window_count, meta):
+        self.last_ts = 0.0
+        self.fills = array('d')
+        self.starts = [0] * window_count
+        self.base_usd = 0.0  # cumulative totals before the first kept fill
+        self.base_size = 0.0
+        self.alerted = 0  # bit i set: window i alerted and has not dropped below its threshold since
+        self.meta = meta  # first fill's SERIES_META_FIELDS, strings interned
+
+    @staticmethod
+    def extract_meta(trade):
+        get = trade.get
+        return tuple([_intern(get(f)) for f in SERIES_META_FIELDS])
+
+    def meta_dict(self):
+        return meta_dict(self.meta)
+
+    def cumulative_before(self, offset):
+        """Cumulative (usd, size) of the fills before `offset`."""
+        if offset:
+            return self.fills[offset - 2], self.fills[offset - 1]
+        return self.base_usd, self.base_size
+
+    def window_totals(self, i):
+        """(fills, usd, size) of window i, amounts in AMOUNT_SCALE units."""
+        fills, start = self.fills, self.starts[i]
+        usd_before, size_before = self.cumulative_before(start)
+        return (len(fills) - start) // 3, fills[-2] - usd_before, fills[-1] - size_before
+
+    def add(self, ts, usd, size, windows):
+        """Add a fill and return the bitmask of windows that just reached their threshold."""
+        if ts < self.last_ts:
+            ts = self.last_ts  # late fills count at the newest timestamp, keeping `fills` ordered
+        self.last_ts = ts
+        fills, starts = self.fills, self.starts
+        usd_total, size_total = self.cumulative_before(len(fills))
+        fills.append(ts)
+        fills.append(usd_total + usd)
+        fills.append(size_total + size)
+
+        fired = 0
+        for i, (window_sec, threshold) in enumerate(windows):
+            start = starts[i]
+            cutoff = ts - window_sec
+            while fills[start] < cutoff:
+                start += 3
+            starts[i] = start
+            usd_before = fills[start - 2] if start else self.base_usd
+            bit = 1 << i
+            if usd_total - usd_before < threshold:
+                self.alerted &= ~bit  # re-arm once the window's volume fell below
+            if usd_total + usd - usd_before >= threshold and not self.alerted & bit:
+                self.alerted |= bit
+                fired |= bit
+
+        self.compact()
+        return fired
+
+    def compact(self):
+        """Drop fills no window needs once they make up half of the log."""
+        fills = self.fills
+        # The longest window holds the oldest fill still needed
+        oldest = self.starts[-1]
+        if oldest >= 3 * FILLS_COMPACT_MIN and 2 * oldest >= len(fills):
+            self.base_usd, self.base_size = fills[oldest - 2], fills[oldest - 1]
+            del fills[:oldest]
+            self.starts = [start - oldest for start in self.starts]
+
+
+def meta_dict(meta):
+    return {f: v for f, v in zip(SERIES_META_FIELDS, meta) if v is not None}
+
+
+def _lowest_window(fired):
+    """Index of the shortest window in a fired bitmask."""
+    return (fired & -fired).bit_length() - 1
+
+
+class TradeAggregator:
+    """
+    Aggregates fills per wallet/market/side/outcome over several sliding windows.
+    A fill alerts once for the shortest window it takes to its threshold.
+    Expiry runs on trade time (the newest timestamp seen), not the wall clock,
+    so replayed traffic ages exactly like live traffic.
+    """
+
+    def __init__(self, windows=AGGREGATION_WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self.max_window = self.windows[-1][0]
+        # (seconds, threshold) with thresholds in AMOUNT_SCALE units
+        self.thresholds = tuple((sec, usd * AMOUNT_SCALE) for sec, usd in self.windows)
+        self.series = {}  # key -> SeriesState
+        self.clock = 0.0  # newest trade timestamp seen
+        self.last_cleanup = 0.0  # trade time of the last cleanup
+        # Min-heap of (expires_at, seq, key), one entry per series. Entries go
+        # stale when a series sees new fills; cleanup reschedules them on pop
+        # instead of rewriting the heap on every trade.
+        self.expiry_heap = []
+        self._expiry_seq = 0
+        self.expired_total = 0
+        self.last_expired = 0  # series dropped by the most recent cleanup
+        self.alerts_by_window = {window_sec: 0 for window_sec, _ in self.windows}
+
+    def _get_key(self, trade):
+        return (
+            trade.get('proxyWallet', ''),
+            trade.get('conditionId', ''),
+            trade.get('side', ''),
+            trade.get('outcomeIndex', str(trade.get('outcome', '')))
+        )
+
+    def process_trade(self, trade):
+        """
+        Process a new trade.
+        Returns: aggregated_trade dict if a series triggers an alert, else None.
+        """
+        key = self._get_key(trade)
+        now_ts = trade.get('timestamp', time.time())
+        try:
+             # Ensure timestamp is int/float
+            now_ts = float(now_ts)
+        except:
+            now_ts = time.time()
+
+        price = float(trade.get('price', 0))
+        size = float(trade.get('size', 0))
+        if now_ts > self.clock:
+            self.clock = now_ts
+
+        s = self.series.get(key)
+        if s is None:
+            # Start new series (interned key: it lives as long as the series)
+            key = tuple(map(_intern, key))
+            self._schedule_expiry(key, now_ts)
+            s = self.series[key] = SeriesState(len(self.windows), SeriesState.extract_meta(trade))
+
+        # Whole AMOUNT_SCALE units: window totals are exact differences of
+        # cumulative sums, whichever order they are added in
+        fired = s.add(now_ts, float(round(price * size * AMOUNT_SCALE)),
+                      float(round(size * AMOUNT_SCALE)), self.thresholds)
+        if not fired:
+            return None
+        return self._build_alert(s.meta, fired, *s.window_totals(_lowest_window(fired)))
+
+    def _build_alert(self, meta, fired, fills, usd_units, size_units):
+        """Aggregate trade object for the shortest window in the `fired` bitmask."""
+        window_sec = self.windows[_lowest_window(fired)][0]
+        self.alerts_by_window[window_sec] += 1
+        usd_sum = usd_units / AMOUNT_SCALE
+        size_sum = size_units / AMOUNT_SCALE
+        avg_price = usd_units / size_units if size_units > 0 else 0
+
+        agg_trade = meta_dict(meta)
+        agg_trade.update({
+            'is_aggregate': True,
+            'series_fills': fills,
+            'series_usd_sum': usd_sum,
+            'series_avg_price': avg_price,
+            'series_window_sec': window_sec,
+            # Every window that crossed on this fill (they will not alert separately)
+            'series_windows_fired': [w for j, (w, _) in enumerate(self.windows) if fired >> j & 1],
+            # Override size/price with totals for accurate display logic
+            'size': size_sum,
+            'price': avg_price,
+            'value_usd': usd_sum # Pre-calculate for main.py
+        })
+        return agg_trade
+
+    def _schedule_expiry(self, key, last_ts):
+        self._expiry_seq += 1
+        heapq.heappush(
+            self.expiry_heap,
+            (last_ts + self.max_window + SERIES_IDLE_GRACE, self._expiry_seq, key)
+        )
+
+    def cleanup(self):
+        """Garbage collect old series (only heap entries that are due are visited)."""
+        now = self.clock
+        if now - self.last_cleanup < 10:
+            return
+
+        heap = self.expiry_heap
+        expired = 0
+        while heap and heap[0][0] < now:
+            _, _, key = heapq.heappop(heap)
+            s = self.series.get(key)
+            if s is None:
+                continue
+            # If nothing happened for the longest window + buffer, delete
+            if now - s.last_ts > self.max_window + SERIES_IDLE_GRACE:
+                del self.series[key]
+                expired += 1
+            else:
+                self._schedule_expiry(key, s.last_ts)
+
+        self.expired_total += expired
+        self.last_expired = expired
+        self.last_cleanup = now
+
+    def snapshot(self):
+        """Copy the live series into plain tuples that can be pickled on another thread."""
+        with _gc_paused():
+            entries = [
+                (key, s.meta, s.last_ts, s.alerted, s.starts[:],
+                 s.base_usd, s.base_size, s.fills.tobytes())
+                for key, s in self.series.items()
+            ]
+        return (SNAPSHOT_VERSION, time.time(), self.windows, entries)
+
+    def restore(self, state, now=None):
+        """
+        Load series from a snapshot() that are still live at trade time `now`
+        (default: the snapshot's newest fill); returns how many.
+        """
+        version, saved_at, windows, entries = state
+        if version != SNAPSHOT_VERSION or tuple(map(tuple, windows)) != self.windows:
+            logger.warning("Aggregator snapshot does not match the current windows; ignoring it")
+            return 0
+        if now is None:
+            now = max((entry[2] for entry in entries), default=0.0)
+        self.clock = max(self.clock, now)
+        cutoff = now - self.max_window - SERIES_IDLE_GRACE
+        restored = 0
+        window_count = len(self.windows)
+        with _gc_paused():
+            for key, meta, last_ts, alerted, starts, base_usd, base_size, fills in entries:
+                if last_ts < cutoff:
+                    continue
+                # Strings shared between series are shared again after unpickling
+                s = SeriesState(window_count, meta)
+                s.last_ts = last_ts
+                s.alerted = alerted
+                s.starts = starts
+                s.base_usd, s.base_size = base_usd, base_size
+                s.fills.frombytes(fills)
+                if key not in self.series:
+                    self._schedule_expiry(key, last_ts)
+                self.series[key] = s
+                restored += 1
+        return restored
+
+    def get_stats(self):
+        return {
+            "active_series": len(self.series),
+            "scheduled": len(self.expiry_heap),
+            "expired_total": self.expired_total,
+            "last_expired": self.last_expired,
+            "alerts_by_window": dict(self.alerts_by_window),
+        }
+
+
+def write_snapshot(path, state):
+    """Pickle an aggregator snapshot atomically (temp file + rename)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    with open(path, 'rb') as f, _gc_paused():
+        return pickle.load(f)
@@ -0,0 +1,100 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+WRITE_RETRIES = 3  # extra attempts for a batch whose apply() raised
+WRITE_RETRY_DELAY = 0.5  # seconds before the first retry, doubling after each
+
+
+class GroupCommitWriter:
+    """
+    Background thread that owns one SQLite connection and applies queued writes.
+
+    Callers put() items from any thread. The writer drains everything queued
+    since its last batch and hands it to `apply(conn, items)` in one call, so
+    each transaction covers all pending work however fast items arrive.
+    close() flushes what is queued, then stops the thread.
+
+    A batch whose apply() raises is retried on a fresh connection, so apply()
+    must be safe to repeat (it runs in a transaction that rolls back on
+    error). If every attempt fails, the batch is dropped and handed to
+    `on_failure(items, error)` so the owner can release whatever it was
+    holding for those writes.
+    """
+
+    def __init__(self, connect, apply, name, on_failure=None):
+        self.name = name
+        self._connect = connect
+        self._apply = apply
+        self._on_failure = on_failure
+        self.retries = 0
+        self.failed_batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        conn = self._connect()
+        running = True
+        while running:
+            # Group commit: everything queued since the last transaction goes in one
+            items = [self._queue.get()]
+            try:
+                while True:
+                    items.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            if _STOP in items:
+                running = False
+                items = [item for item in items if item is not _STOP]
+            if not items:
+                continue
+            conn = self._write(conn, items)
+        conn.close()
+
+    def _write(self, conn, items):
+        """Apply one batch, retrying with backoff; returns the connection to keep using."""
+        delay = WRITE_RETRY_DELAY
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                self._apply(conn, items)
+                return conn
+            except Exception as e:
+                error = e
+            if attempt == WRITE_RETRIES:
+                break
+            self.retries += 1
+            logger.warning(f"{self.name} error: {error}; retrying {len(items)} items in {delay:.1f}s")
+            time.sleep(delay)
+            delay *= 2
+            try:
+                conn.close()
+                conn = self._connect()
+            except Exception as e:
+                logger.warning(f"{self.name} reconnect failed: {e}")
+
+        self.failed_batches += 1
+        logger.error(f"{self.name} error: {error}; dropping {len(items)} items after {WRITE_RETRIES} retries")
+        if self._on_failure:
+            try:
+                self._on_failure(items, error)
+            except Exception as e:
+                logger.error(f"{self.name} failure handler error: {e}")
+        return conn
+
+    def close(self):
+        """Flush pending writes, then stop the writer."""
+        self._queue.put(_STOP)
+        self._thread.join()
@@ -0,0 +1,121 @@
+import logging
+import os
+import sqlite3
+
+from services.db_writer import GroupCommitWriter
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_PATH = "data/outbox.db"
+
+
+class OutboxJournal:
+    """
+    SQLite journal of messages accepted for delivery but not yet finished.
+
+    The delivery engine appends each message when it is accepted and removes
+    it once it is sent, given up on or expired; whatever is still journaled
+    at startup is replayed. Writes go through a GroupCommitWriter that commits
+    everything pending in one transaction, and an append whose removal is in
+    the same batch never touches the disk, so messages delivered within a
+    commit interval cost nothing beyond the queue put.
+    """
+
+    def __init__(self, path=OUTBOX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        # chat_id has no declared type so int ids and "@channel" names round-trip
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY,
+                chat_id NOT NULL,
+                text TEXT NOT NULL,
+                level INTEGER,
+                queued_at REAL NOT NULL
+            );
+        """)
+        conn.commit()
+        self.pending = conn.execute(
+            "SELECT id, chat_id, text, level, queued_at FROM outbox ORDER BY id"
+        ).fetchall()
+        self.next_id = (self.pending[-1][0] + 1) if self.pending else 1
+        conn.close()
+
+        self.commits = 0
+        self.rows_written = 0
+        self.rows_deleted = 0
+        self.writes_skipped = 0  # appended and removed within one batch
+        self.writes_failed = 0  # appends/removals dropped after the writer gave up
+        self._writer = GroupCommitWriter(
+            self._connect, self._apply_writes, name="outbox-write", on_failure=self._writes_failed
+        )
+
+    def take_pending(self):
+        """Rows left over from the previous run, (id, chat_id, text, level, queued_at); returned once."""
+        rows, self.pending = self.pending, []
+        return rows
+
+    def append(self, msg_id, chat_id, text, level, queued_at):
+        self._writer.put((msg_id, chat_id, text, level, queued_at))
+
+    def remove(self, msg_id):
+        self._writer.put(msg_id)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        return conn
+
+    def _apply_writes(self, conn, items):
+        """One writer batch: appends and removals in one commit, skipping pairs that cancel out."""
+        added = {}
+        deleted = []
+        skipped = 0
+        for item in items:
+            if isinstance(item, tuple):
+                added[item[0]] = item
+            elif added.pop(item, None) is not None:
+                skipped += 1
+            else:
+                deleted.append((item,))
+
+        if not added and not deleted:
+            self.writes_skipped += skipped
+            return
+        with conn:
+            if added:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO outbox(id, chat_id, text, level, queued_at) VALUES (?, ?, ?, ?, ?)",
+                    list(added.values())
+                )
+            if deleted:
+                conn.executemany("DELETE FROM outbox WHERE id = ?", deleted)
+        self.commits += 1
+        self.writes_skipped += skipped
+        self.rows_written += len(added)
+        self.rows_deleted += len(deleted)
+
+    def _writes_failed(self, items, error):
+        """
+        The writer gave up on a batch. Delivery itself is unaffected: a lost
+        append only means the message is not replayed after a crash, and a
+        lost removal means it is replayed once more on the next start.
+        """
+        self.writes_failed += len(items)
+
+    def get_stats(self):
+        return {
+            "pending_writes": self._writer.qsize(),
+            "commits": self.commits,
+            "rows_written": self.rows_written,
+            "rows_deleted": self.rows_deleted,
+            "writes_skipped": self.writes_skipped,
+            "writes_failed": self.writes_failed,
+            "write_retries": self._writer.retries,
+        }
+
+    def close(self):
+        """Flush pending writes, then stop the writer."""
+        self._writer.close()
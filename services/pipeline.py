@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Pipeline configuration
+FANOUT_WORKERS = 2
+ALERT_QUEUE_SIZE = 1000  # aggregated alerts waiting for fan-out
+DRAIN_TIMEOUT = 10  # seconds to flush pending work on shutdown
+LAG_PROBE_INTERVAL = 0.1  # event loop lag sampling period
+LAG_WARN_MS = 100  # log when the loop was blocked longer than this
+STATS_LOG_INTERVAL = 300  # seconds between runtime stats log lines
+
+
+class Stage:
+    """A bounded queue plus the workers that consume it."""
+
+    def __init__(self, name, handler, workers, maxsize):
+        self.name = name
+        self.handler = handler
+        self.worker_count = workers
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.tasks = []
+        self.processed = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.put_wait_sec = 0.0  # time producers spent blocked on a full queue
+        self.blocked_puts = 0
+
+    def start(self):
+        for i in range(self.worker_count):
+            self.tasks.append(asyncio.create_task(self._worker(), name=f"{self.name}-{i}"))
+
+    async def put(self, item):
+        if self.queue.full():
+            self.blocked_puts += 1
+            start = time.perf_counter()
+            await self.queue.put(item)
+            self.put_wait_sec += time.perf_counter() - start
+        else:
+            self.queue.put_nowait(item)
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    async def _worker(self):
+        while True:
+            item = await self.queue.get()
+            try:
+                await self.handler(*item)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Pipeline stage {self.name} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def get_stats(self):
+        return {
+            "workers": self.worker_count,
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "processed": self.processed,
+            "errors": self.errors,
+            "blocked_puts": self.blocked_puts,
+            "put_wait_sec": round(self.put_wait_sec, 3),
+        }
+
+
+class AlertPipeline:
+    """
+    Decouples ingest from delivery.
+
+    PolymarketService.poll_trades (fetch -> dedup -> aggregate) hands each
+    aggregated alert to submit(), which only enqueues it. Fan-out workers run
+    `fanout(trade, deliver)` to match subscribers and render messages, passing
+    each (chat_id, text, level) straight to `deliver`. `deliver` is expected
+    to only enqueue (send_trade_alert -> DeliveryEngine.submit, which has its
+    own bounded queue and workers), so a slow Telegram round trip backs up the
+    delivery engine, then the alert queue, and reaches the poller only when
+    both are full.
+    """
+
+    def __init__(self, fanout, deliver, fanout_workers=FANOUT_WORKERS, alert_queue_size=ALERT_QUEUE_SIZE):
+        self.fanout = fanout
+        self.deliver = deliver
+        self.fanout_stage = Stage("fanout", self._fanout, fanout_workers, alert_queue_size)
+
+    def start(self):
+        self.fanout_stage.start()
+        logger.info(f"Alert pipeline started ({self.fanout_stage.worker_count} fan-out workers)")
+
+    async def submit(self, trade):
+        """Callback for poll_trades: enqueue an aggregated alert."""
+        await self.fanout_stage.put((trade,))
+
+    async def _fanout(self, trade):
+        await self.fanout(trade, self.deliver)
+
+    async def close(self, timeout=DRAIN_TIMEOUT):
+        """Drain pending alerts into `deliver` (up to `timeout`), then stop workers."""
+        try:
+            await asyncio.wait_for(self.fanout_stage.queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Pipeline drain timed out; dropping {self.fanout_stage.queue.qsize()} alerts")
+        await self.fanout_stage.stop()
+
+    def get_stats(self):
+        """Get fan-out queue and backpressure statistics."""
+        return {
+            "fanout": self.fanout_stage.get_stats(),
+        }
+
+
+class LoopLagMonitor:
+    """
+    Measures how long the event loop was blocked: a probe sleeps for
+    LAG_PROBE_INTERVAL and records how late it woke up.
+    """
+
+    def __init__(self, interval=LAG_PROBE_INTERVAL, warn_ms=LAG_WARN_MS):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.samples = 0
+        self.max_lag_ms = 0.0
+        self.total_lag_ms = 0.0
+        self.stalls = 0  # samples above warn_ms
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._probe(), name="loop-lag-monitor")
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.samples += 1
+            self.total_lag_ms += lag_ms
+            if lag_ms > self.max_lag_ms:
+                self.max_lag_ms = lag_ms
+            if lag_ms > self.warn_ms:
+                self.stalls += 1
+                logger.warning(f"Event loop blocked for {lag_ms:.0f} ms")
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def get_stats(self):
+        return {
+            "samples": self.samples,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "avg_lag_ms": round(self.total_lag_ms / self.samples, 2) if self.samples else 0.0,
+            "stalls": self.stalls,
+        }
+
+
+class StatsReporter:
+    """
+    Collects get_stats() from the running components for the owner /stats
+    command and logs them as one line every `interval` seconds.
+    Nested dicts are flattened to dotted keys; lists are left out.
+    """
+
+    def __init__(self, interval=STATS_LOG_INTERVAL):
+        self.interval = interval
+        self.sources = {}  # name -> get_stats callable
+        self.task = None
+
+    def add(self, name, get_stats):
+        self.sources[name] = get_stats
+
+    def lines(self):
+        """One `name: key=value ...` line per source."""
+        lines = []
+        for name, get_stats in self.sources.items():
+            try:
+                fields = _flatten(get_stats())
+            except Exception as e:
+                fields = [f"error={e}"]
+            lines.append(f"{name}: {' '.join(fields)}")
+        return lines
+
+    def start(self):
+        self.task = asyncio.create_task(self._report(), name="stats-reporter")
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            logger.info("Stats | " + " | ".join(self.lines()))
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+
+def _flatten(stats, prefix=""):
+    fields = []
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            fields.extend(_flatten(value, f"{prefix}{key}."))
+        elif not isinstance(value, (list, tuple)):
+            fields.append(f"{prefix}{key}={value}")
+    return fields
@@ -4,9 +4,20 @@ import aiohttp
 import time
 import sqlite3
 import os
+import json
+import re
+import codecs
+import hashlib
+import heapq
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 from collections import OrderedDict
 
+from services.aggregator import TradeAggregator, read_snapshot, write_snapshot
+from services.db_writer import GroupCommitWriter
+
 logger = logging.getLogger(__name__)
 
 # Data API endpoint (public, no auth required)
@@ -14,17 +25,228 @@ DATA_API_URL = "https://data-api.polymarket.com"
 
 # Polling configuration
 POLL_INTERVAL = 3
+MIN_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 10000
+PAGE_HEADROOM = 3  # fetch this many times the expected arrivals per poll
+ARRIVAL_EWMA_ALPHA = 0.3
+GAP_FETCH_CONCURRENCY = 8  # max parallel requests while recovering a gap (below HTTP_POOL_SIZE)
+GAP_HEADROOM = 1.5  # first recovery wave covers this many times the estimated missing trades
+GAP_WARN_DEPTH = 5 * MAX_PAGE_LIMIT  # recovery deeper than this is logged as a warning
+GAP_MAX_PAGES = 40  # hard stop for one recovery (~350,000 trades once pages reach MAX_PAGE_LIMIT)
+GAP_FETCH_RETRIES = 3  # attempts per recovery page before recovery gives up
+GAP_RETRY_DELAY = 1.0  # seconds before the first retry; doubles per attempt
+GAP_RETRY_MAX_DELAY = 4.0
+GAP_MAX_UNRECOVERED_POLLS = 3  # polls in a row a gap may stay unrecovered before it is written off
+MIN_WAKE_INTERVAL = 1.0  # seconds between poll starts when push sources wake the poller
+MAX_ACTIVE_ASSETS = 500  # most recently traded assets tracked for push subscriptions
+RESUME_MAX_AGE = 300  # seconds; an older saved watermark is dropped, and older trades never send alerts
 MAX_LRU_SIZE = 10000
 DB_PATH = "data/trades.db"
 TTL_HOURS = 72
+KEY_DIGEST_SIZE = 16  # bytes; seen keys are blake2b digests of the raw key
+# 1 = TEXT raw keys, 2 = BLOB digests, 3 = digests in time partitions
+SCHEMA_VERSION = 3
+
+# Seen keys live in one table per PARTITION_HOURS of seen_at
+# (seen_trades_p<hour>); expiry drops whole partitions
+PARTITION_HOURS = 6
+PARTITION_MS = PARTITION_HOURS * 3600 * 1000
+PARTITION_PREFIX = "seen_trades_p"
+
+# Bloom pre-filter: one filter per partition, so a lookup only queries the
+# partitions that may hold the key
+BLOOM_BUCKET_CAPACITY = 500000  # keys per bucket before the FP rate degrades
+BLOOM_FP_RATE = 0.0001  # per bucket; a lookup checks every live bucket
+LOOKUP_CHUNK = 500  # keys per IN (...) query, below SQLite's variable limit
+
+# Aggregator state (services/aggregator.py) is snapshotted next to the DB
+SNAPSHOT_INTERVAL = 30  # seconds between snapshots
+
+# HTTP transport configuration (one pooled keep-alive session per service)
+HTTP_POOL_SIZE = 10
+HTTP_KEEPALIVE_SEC = 60
+DNS_CACHE_TTL = 300
+REQUEST_TIMEOUT = 10
+
+try:
+    import brotli  # noqa: F401  (enables aiohttp br decoding)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Streaming decode: read the body in chunks and keep only the fields we use
+STREAM_CHUNK_SIZE = 64 * 1024
+TRADE_FIELDS = (
+    'proxyWallet', 'maker', 'name', 'pseudonym',
+    'conditionId', 'asset', 'side', 'outcome', 'outcomeIndex',
+    'price', 'size', 'timestamp', 'transactionHash',
+    'title', 'slug', 'eventSlug',
+)
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_SEPARATORS = re.compile(r'[\s,]*')
+
+_QUANTUM = Decimal("0.000001")  # dedup keys carry prices and sizes at this precision
+NORMALIZE_CACHE_SIZE = 65536  # distinct price/size values remembered by raw_key
+
+
+async def iter_json_array(chunks):
+    """
+    Incrementally decode a top-level JSON array from an async iterator of
+    byte chunks, yielding each element as soon as it is complete.
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    started = False
+    done = False
+    async for chunk in chunks:
+        if done:
+            continue  # drain trailing bytes so the source is fully consumed
+        buf += utf8.decode(chunk)
+        pos = 0
+        if not started:
+            pos = _JSON_SEPARATORS.match(buf, 0).end()
+            if pos >= len(buf):
+                continue
+            if buf[pos] != '[':
+                raise ValueError(f"Expected JSON array, got: {buf[pos:pos + 200]}")
+            started = True
+            pos += 1
+        while True:
+            pos = _JSON_SEPARATORS.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            if buf[pos] == ']':
+                done = True
+                break
+            try:
+                item, pos = _JSON_DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # element continues in the next chunk
+            yield item
+        buf = buf[pos:]
+    if not done:
+        raise ValueError("Truncated JSON array in response body")
+
+
+def partition_start(ms):
+    return ms - ms % PARTITION_MS
+
+
+def partition_table(start_ms):
+    return f"{PARTITION_PREFIX}{start_ms // 3600000}"
+
+
+def list_partitions(conn):
+    """Return the start (ms) of every existing partition, oldest first."""
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ?",
+        (PARTITION_PREFIX + '%',)
+    )
+    return sorted(int(name[len(PARTITION_PREFIX):]) * 3600000 for (name,) in rows)
+
+
+def create_partition(conn, start_ms):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {partition_table(start_ms)} (
+            trade_key BLOB PRIMARY KEY,
+            seen_at INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    """)
+
+
+class SeenFilter:
+    """
+    Time-bucketed Bloom filter over seen trade keys, one bucket per partition.
+    A negative answer is definite, so lookups can skip SQLite entirely.
+    Keys are already uniform digests, so bit positions come straight from them.
+    """
+
+    def __init__(self, capacity=BLOOM_BUCKET_CAPACITY, fp_rate=BLOOM_FP_RATE,
+                 bucket_ms=PARTITION_MS):
+        self.num_bits = int(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bucket_ms = bucket_ms
+        self.buckets = OrderedDict()  # bucket start (ms) -> bytearray
+        self.counts = {}  # bucket start (ms) -> keys added
+
+    def _positions(self, key):
+        h = int.from_bytes(key[:16], 'little')
+        h1 = h & 0xFFFFFFFFFFFFFFFF
+        h2 = (h >> 64) | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, key, seen_at_ms):
+        start = seen_at_ms - seen_at_ms % self.bucket_ms
+        bits = self.buckets.get(start)
+        if bits is None:
+            bits = self.buckets[start] = bytearray((self.num_bits + 7) // 8)
+            self.counts[start] = 0
+            # Buckets usually arrive in time order; keep them sorted for expire()
+            self.buckets = OrderedDict(sorted(self.buckets.items()))
+        for p in self._positions(key):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.counts[start] += 1
+
+    def merge(self, other):
+        """Fold another filter's buckets into this one (bitwise OR per bucket)."""
+        for start, bits in other.buckets.items():
+            own = self.buckets.get(start)
+            if own is None:
+                self.buckets[start] = bytearray(bits)
+                self.counts[start] = other.counts[start]
+                continue
+            merged = int.from_bytes(own, 'little') | int.from_bytes(bits, 'little')
+            self.buckets[start] = bytearray(merged.to_bytes(len(own), 'little'))
+            self.counts[start] += other.counts[start]
+        self.buckets = OrderedDict(sorted(self.buckets.items()))
+
+    def candidate_buckets(self, key):
+        """Starts of the buckets that may contain key (empty = definitely unseen)."""
+        positions = self._positions(key)
+        found = []
+        for start, bits in self.buckets.items():
+            for p in positions:
+                if not bits[p >> 3] & (1 << (p & 7)):
+                    break
+            else:
+                found.append(start)
+        return found
+
+    def might_contain(self, key):
+        return bool(self.candidate_buckets(key))
+
+    def expire(self, cutoff_ms):
+        """Drop buckets that end before cutoff_ms."""
+        for start in list(self.buckets):
+            if start + self.bucket_ms > cutoff_ms:
+                break
+            del self.buckets[start]
+            del self.counts[start]
+
+    def get_stats(self):
+        return {
+            "buckets": len(self.buckets),
+            "keys": sum(self.counts.values()),
+            "max_bucket_keys": max(self.counts.values(), default=0),
+            "bytes": len(self.buckets) * ((self.num_bits + 7) // 8),
+        }
 
 
 class TradePersistence:
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
         self.lru = OrderedDict()
+        self._normalized = {}  # (type, raw price/size value) -> normalized string
         self._init_db()
         self.last_cleanup = time.time()
+        
+        self.filter = SeenFilter()
+        self.filter_skips = 0  # DB lookups avoided by a definite filter miss
+        self.filter_false_positives = 0  # filter said maybe, DB said no
+        self.last_timestamp = self._load_watermark(self.conn)
+        self._load_filter()
 
     def _init_db(self):
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
@@ -34,55 +256,219 @@ class TradePersistence:
         self.conn.execute("PRAGMA synchronous=NORMAL;")
         self.conn.execute("PRAGMA temp_store=MEMORY;")
         
+        version = self.conn.execute("PRAGMA user_version;").fetchone()[0]
+        has_legacy_table = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='seen_trades'"
+        ).fetchone()
+        if has_legacy_table:
+            if version < 2:
+                self._migrate_to_digest_keys()
+            self._migrate_to_partitions()
+        
+        # Small key/value table for poller state that should survive restarts
         self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS seen_trades (
-                trade_key TEXT PRIMARY KEY,
-                seen_at INTEGER NOT NULL
+            CREATE TABLE IF NOT EXISTS poll_state (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
             );
         """)
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_at ON seen_trades(seen_at);")
+        self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION};")
         self.conn.commit()
 
+    def _load_filter(self):
+        """Rebuild the Bloom filter and warm the LRU from disk (blocking)."""
+        self._apply_loaded(*self._scan_seen(self.conn))
+
+    @staticmethod
+    def _scan_seen(conn):
+        """
+        Build a Bloom filter from partitions still inside the TTL window, and
+        collect the newest MAX_LRU_SIZE keys from the same scan, oldest first.
+        Touches no instance state, so it can run on another thread.
+        """
+        start = time.perf_counter()
+        cutoff_ms = int((time.time() - (TTL_HOURS * 3600)) * 1000)
+        seen_filter = SeenFilter()
+        count = 0
+        recent = []  # min-heap of the newest MAX_LRU_SIZE (seen_at, key) from the newest partitions
+        for part in reversed(list_partitions(conn)):
+            if part + PARTITION_MS <= cutoff_ms:
+                break
+            want_recent = len(recent) < MAX_LRU_SIZE
+            cursor = conn.execute(f"SELECT trade_key, seen_at FROM {partition_table(part)}")
+            for key, seen_at in cursor:
+                seen_filter.add(key, part)
+                if want_recent:
+                    if len(recent) < MAX_LRU_SIZE:
+                        heapq.heappush(recent, (seen_at, key))
+                    elif seen_at > recent[0][0]:
+                        heapq.heapreplace(recent, (seen_at, key))
+                count += 1
+        
+        recent.sort()
+        logger.info(f"Seen-trades filter loaded {count} keys in {time.perf_counter() - start:.2f}s")
+        return seen_filter, [key for _, key in recent]
+
+    def _apply_loaded(self, seen_filter, recent_keys):
+        """Install a scanned filter and LRU, keeping keys added while the scan ran."""
+        seen_filter.merge(self.filter)
+        self.filter = seen_filter
+        added = list(self.lru)
+        self.lru.clear()
+        for key in recent_keys + added:
+            self._add_to_lru(key)
+
+    @staticmethod
+    def _load_watermark(conn):
+        row = conn.execute("SELECT value FROM poll_state WHERE name='last_timestamp'").fetchone()
+        return row[0] if row else 0
+
+    def _migrate_to_digest_keys(self):
+        """Rewrite a v1 table (TEXT raw keys) into digest keys, keeping seen_at."""
+        logger.info("Migrating seen_trades to compact digest keys...")
+        self.conn.create_function("key_digest", 1, self._digest, deterministic=True)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE seen_trades_v2 (
+                    trade_key BLOB PRIMARY KEY,
+                    seen_at INTEGER NOT NULL
+                ) WITHOUT ROWID;
+            """)
+            self.conn.execute("""
+                INSERT OR IGNORE INTO seen_trades_v2(trade_key, seen_at)
+                SELECT key_digest(trade_key), seen_at FROM seen_trades;
+            """)
+            self.conn.execute("DROP TABLE seen_trades;")
+            self.conn.execute("ALTER TABLE seen_trades_v2 RENAME TO seen_trades;")
+        logger.info("Migration completed")
+
+    def _migrate_to_partitions(self):
+        """Split a v2 seen_trades table into time partitions, dropping expired rows."""
+        logger.info("Migrating seen_trades to time partitions...")
+        cutoff_ms = int((time.time() - (TTL_HOURS * 3600)) * 1000)
+        with self.conn:
+            starts = [row[0] for row in self.conn.execute(
+                "SELECT DISTINCT seen_at - seen_at % ? FROM seen_trades WHERE seen_at >= ?",
+                (PARTITION_MS, cutoff_ms)
+            )]
+            for part in starts:
+                create_partition(self.conn, part)
+                self.conn.execute(
+                    f"""INSERT OR IGNORE INTO {partition_table(part)}(trade_key, seen_at)
+                        SELECT trade_key, seen_at FROM seen_trades
+                        WHERE seen_at >= ? AND seen_at < ?""",
+                    (part, part + PARTITION_MS)
+                )
+            self.conn.execute("DROP TABLE seen_trades;")
+        self.conn.execute("VACUUM;")
+        logger.info(f"Migration completed ({len(starts)} partitions)")
+
+    @staticmethod
+    def _digest(raw_key):
+        return hashlib.blake2b(raw_key.encode(), digest_size=KEY_DIGEST_SIZE).digest()
+
     def _normalize_decimal(self, val):
         try:
-            return str(Decimal(str(val)).quantize(Decimal("0.000001")))
+            return str(Decimal(str(val)).quantize(_QUANTUM))
         except:
             return "0.000000"
 
+    def _normalize_number(self, val):
+        """
+        Memoized _normalize_decimal. Prices sit on a small tick grid and sizes
+        repeat, so most values skip the Decimal round trip entirely. Only
+        str/int/float values are cached, keyed by type as well: equal values
+        of one type normalize identically, but an int and an equal float need
+        not (2**60 vs float(2**60)). Zero (-0.0 keeps its sign) is left uncached.
+        """
+        cls = type(val)
+        if (cls is float or cls is str or cls is int) and val != 0:
+            slot = (cls, val)
+            cached = self._normalized.get(slot)
+            if cached is None:
+                if len(self._normalized) >= NORMALIZE_CACHE_SIZE:
+                    self._normalized.clear()
+                cached = self._normalized[slot] = self._normalize_decimal(val)
+            return cached
+        return self._normalize_decimal(val)
+
     def generate_key(self, trade):
+        """Compact fixed-width dedup key: digest of the normalized raw key."""
+        return self._digest(self.raw_key(trade))
+
+    def raw_key(self, trade):
         # Normalization
-        price = self._normalize_decimal(trade.get('price', 0))
-        size = self._normalize_decimal(trade.get('size', 0))
+        price = self._normalize_number(trade.get('price', 0))
+        size = self._normalize_number(trade.get('size', 0))
         try:
             ts = int(trade.get('timestamp', 0))
         except:
             ts = 0
         
-        parts = [
-            trade.get('proxyWallet', ''),
-            trade.get('conditionId', ''),
-            trade.get('side', ''),
-            trade.get('outcomeIndex', ''),
-            price,
-            size,
-            ts,
-            trade.get('transactionHash', '')
-        ]
-        return "|".join(str(p) for p in parts)
+        return (
+            f"{trade.get('proxyWallet', '')}|{trade.get('conditionId', '')}|"
+            f"{trade.get('side', '')}|{trade.get('outcomeIndex', '')}|"
+            f"{price}|{size}|{ts}|{trade.get('transactionHash', '')}"
+        )
 
     def is_seen(self, key):
-        # 1. Check LRU
-        if key in self.lru:
-            self.lru.move_to_end(key)
-            return True
-        
-        # 2. Check DB
-        cursor = self.conn.execute("SELECT 1 FROM seen_trades WHERE trade_key=? LIMIT 1", (key,))
-        if cursor.fetchone():
+        return not self.filter_new([key])
+
+    def filter_new(self, keys):
+        """
+        Batch dedup: return the keys (in order) that were never seen.
+        LRU and filter are checked first; the remaining candidates are looked
+        up only in the partitions the filter points at, with one IN (...)
+        query per LOOKUP_CHUNK keys.
+        """
+        cached, candidates = self._check_memory(keys)
+        found = self._lookup_keys(self.conn, candidates)
+        return self._resolve_new(keys, cached, candidates, found)
+
+    def _check_memory(self, keys):
+        """
+        Split keys into LRU hits and {partition start: [keys]} candidates
+        the filter cannot rule out.
+        """
+        lru = self.lru
+        cached = set()
+        candidates = {}
+        for key in keys:
+            if key in lru:
+                lru.move_to_end(key)
+                cached.add(key)
+                continue
+            buckets = self.filter.candidate_buckets(key)
+            if not buckets:
+                self.filter_skips += 1
+            for part in buckets:
+                candidates.setdefault(part, []).append(key)
+        return cached, candidates
+
+    @staticmethod
+    def _lookup_keys(conn, candidates):
+        found = set()
+        existing = set(list_partitions(conn))
+        for part, keys in candidates.items():
+            if part not in existing:
+                # Partition not created yet by a pending write; nothing in it to find
+                continue
+            table = partition_table(part)
+            for i in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[i:i + LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"SELECT trade_key FROM {table} WHERE trade_key IN ({placeholders})", chunk
+                )
+                found.update(row[0] for row in cursor)
+        return found
+
+    def _resolve_new(self, keys, cached, candidates, found):
+        for key in found:
             self._add_to_lru(key)
-            return True
-        
-        return False
+        candidate_keys = {k for part_keys in candidates.values() for k in part_keys}
+        self.filter_false_positives += len(candidate_keys - found)
+        return [k for k in keys if k not in cached and k not in found]
 
     def _add_to_lru(self, key):
         self.lru[key] = None
@@ -90,7 +476,8 @@ class TradePersistence:
         if len(self.lru) > MAX_LRU_SIZE:
             self.lru.popitem(last=False)
 
-    def add_batch(self, keys):
+    def add_batch(self, keys, last_timestamp=None):
+        """Store new keys; optionally persist the poller watermark in the same commit."""
         if not keys:
             return
         
@@ -98,13 +485,44 @@ class TradePersistence:
         data = [(k, now_ms) for k in keys]
         
         with self.conn:
-            self.conn.executemany(
-                "INSERT OR IGNORE INTO seen_trades(trade_key, seen_at) VALUES (?, ?)",
-                data
-            )
+            self._insert_rows(self.conn, data)
+            if last_timestamp:
+                self._save_watermark(self.conn, last_timestamp)
         
         for k in keys:
             self._add_to_lru(k)
+            self.filter.add(k, now_ms)
+
+    @staticmethod
+    def _insert_rows(conn, rows):
+        """Insert (key, seen_at) rows into their partitions."""
+        by_part = {}
+        for row in rows:
+            by_part.setdefault(partition_start(row[1]), []).append(row)
+        for part, part_rows in by_part.items():
+            create_partition(conn, part)
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {partition_table(part)}(trade_key, seen_at) VALUES (?, ?)",
+                part_rows
+            )
+
+    @staticmethod
+    def _save_watermark(conn, last_timestamp):
+        conn.execute(
+            "INSERT OR REPLACE INTO poll_state(name, value) VALUES ('last_timestamp', ?)",
+            (int(last_timestamp),)
+        )
+
+    @staticmethod
+    def _drop_expired(conn, cutoff_ms):
+        """Drop partitions that end before cutoff_ms; returns how many were dropped."""
+        dropped = 0
+        for part in list_partitions(conn):
+            if part + PARTITION_MS > cutoff_ms:
+                break
+            conn.execute(f"DROP TABLE IF EXISTS {partition_table(part)};")
+            dropped += 1
+        return dropped
 
     def cleanup(self):
         # Run cleanup once hour
@@ -114,158 +532,414 @@ class TradePersistence:
         logger.info("Running DB cleanup...")
         cutoff_ms = int((time.time() - (TTL_HOURS * 3600)) * 1000)
         with self.conn:
-            self.conn.execute("DELETE FROM seen_trades WHERE seen_at < ?", (cutoff_ms,))
+            dropped = self._drop_expired(self.conn, cutoff_ms)
+        self.filter.expire(cutoff_ms)
         self.last_cleanup = time.time()
-        logger.info("DB cleanup completed")
+        logger.info(f"DB cleanup completed ({dropped} partitions dropped)")
 
     def close(self):
         self.conn.close()
 
 
+class AsyncTradePersistence(TradePersistence):
+    """
+    TradePersistence that keeps SQLite off the event loop.
 
-class TradeAggregator:
-    def __init__(self, window_sec=60, min_alert_usd=500):
-        self.window_sec = window_sec
-        self.min_alert_usd = min_alert_usd
-        self.series = {}  # key -> SeriesData
-        self.last_cleanup = time.time()
+    LRU and Bloom filter stay in memory on the loop. The startup scan that
+    rebuilds them and candidate lookups run on a dedicated reader thread (WAL
+    lets it read while the writer commits); filter_new_async awaits them,
+    while filter_new and is_seen block on them and are meant for code that is
+    not running on the loop. Lookups start once the scan has finished.
+    add_batch and cleanup only enqueue work for a writer thread, which groups
+    everything pending into one transaction and drops expired partitions.
+    Keys queued but not yet committed count as seen, since a batch larger
+    than the LRU is otherwise in neither the LRU nor the DB until then.
+    """
 
-    def _get_key(self, trade):
-        return (
-            trade.get('proxyWallet', ''),
-            trade.get('conditionId', ''),
-            trade.get('side', ''),
-            trade.get('outcomeIndex', str(trade.get('outcome', '')))
+    def __init__(self, db_path=DB_PATH):
+        super().__init__(db_path)
+        # The startup connection is only used by the constructor (schema, filter load)
+        self.conn.close()
+        self.conn = None
+        
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trades-db-read")
+        self._read_conn = self._connect(check_same_thread=False)
+        self._loading = self._reader.submit(self._scan_seen, self._read_conn)
+        
+        self._pending = set()  # keys queued for the writer and not yet committed
+        self._pending_lock = threading.Lock()
+        self.commits = 0
+        self.rows_written = 0
+        self.partitions_dropped = 0
+        self.max_commit_ms = 0.0
+        self.rows_failed = 0  # keys dropped after the writer gave up on their batch
+        self._writer = GroupCommitWriter(
+            self._connect, self._apply_writes, name="trades-db-write", on_failure=self._writes_failed
         )
 
-    def process_trade(self, trade):
+    def _load_filter(self):
+        pass  # scanned on the reader thread instead, see __init__
+
+    async def _wait_loaded(self):
+        loading = self._loading
+        if loading is not None:
+            result = await asyncio.wrap_future(loading)
+            if self._loading is loading:
+                self._loading = None
+                self._apply_loaded(*result)
+
+    def _wait_loaded_blocking(self):
+        loading = self._loading
+        if loading is not None:
+            result = loading.result()
+            self._loading = None
+            self._apply_loaded(*result)
+
+    def _connect(self, check_same_thread=True):
+        conn = sqlite3.connect(self.db_path, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        return conn
+
+    async def filter_new_async(self, keys):
+        """filter_new with the SQLite part on the reader thread."""
+        await self._wait_loaded()
+        cached, candidates = self._check_memory(keys)
+        found = set()
+        if candidates:
+            pending = self._pending_among(candidates)
+            loop = asyncio.get_running_loop()
+            found = await loop.run_in_executor(
+                self._reader, self._lookup_keys, self._read_conn, candidates
+            )
+            found |= pending
+        return self._resolve_new(keys, cached, candidates, found)
+
+    def filter_new(self, keys):
         """
-        Process a new trade.
-        Returns: aggregated_trade dict if a series triggers an alert, else None.
+        Blocking filter_new for callers outside the event loop; the SQLite part
+        still runs on the reader thread, which owns the read connection.
         """
-        key = self._get_key(trade)
-        now_ts = trade.get('timestamp', time.time())
-        try:
-             # Ensure timestamp is int/float
-            now_ts = float(now_ts)
-        except:
-            now_ts = time.time()
-
-        price = float(trade.get('price', 0))
-        size = float(trade.get('size', 0))
-        usd_val = price * size
-
-        # Check if series exists and is within window
-        if key in self.series:
-            s = self.series[key]
-            # Window check: 60s from first trade
-            if now_ts - s['first_ts'] > self.window_sec:
-                # Series expired, close old one and start new
-                del self.series[key]
-                s = None
-        else:
-            s = None
-
-        if s is None:
-            # Start new series
-            s = {
-                'first_ts': now_ts,
-                'last_ts': now_ts,
-                'usd_sum': 0.0,
-                'size_sum': 0.0,
-                'volume_weighted_price_sum': 0.0, # price * size sum for VWAP
-                'fills': 0,
-                'alert_sent': False,
-                'base_trade': trade # Keep reference for metadata (title, slug, etc)
-            }
-            self.series[key] = s
-
-        # Update series
-        s['last_ts'] = max(s['last_ts'], now_ts)
-        s['usd_sum'] += usd_val
-        s['size_sum'] += size
-        s['volume_weighted_price_sum'] += (price * size)
-        s['fills'] += 1
-
-        # Check Trigger
-        if s['usd_sum'] >= self.min_alert_usd and not s['alert_sent']:
-            s['alert_sent'] = True
-            
-            # Construct Aggregate Trade Object
-            avg_price = s['volume_weighted_price_sum'] / s['size_sum'] if s['size_sum'] > 0 else 0
-            
-            agg_trade = s['base_trade'].copy()
-            agg_trade.update({
-                'is_aggregate': True,
-                'series_fills': s['fills'],
-                'series_usd_sum': s['usd_sum'],
-                'series_avg_price': avg_price,
-                'series_window_sec': self.window_sec,
-                # Override size/price with totals for accurate display logic
-                'size': s['size_sum'], 
-                'price': avg_price,
-                'value_usd': s['usd_sum'] # Pre-calculate for main.py
-            })
-            return agg_trade
-        
-        return None
+        self._wait_loaded_blocking()
+        cached, candidates = self._check_memory(keys)
+        found = set()
+        if candidates:
+            pending = self._pending_among(candidates)
+            found = self._reader.submit(self._lookup_keys, self._read_conn, candidates).result()
+            found |= pending
+        return self._resolve_new(keys, cached, candidates, found)
+
+    def _pending_among(self, candidates):
+        """
+        Candidate keys still queued for the writer. Taken before the DB lookup
+        starts: a key not pending now is already committed (so the lookup sees
+        it, partition included) or was never written.
+        """
+        with self._pending_lock:
+            return {k for part_keys in candidates.values() for k in part_keys if k in self._pending}
+
+    def add_batch(self, keys, last_timestamp=None):
+        if not keys:
+            return
+        now_ms = int(time.time() * 1000)
+        for k in keys:
+            self._add_to_lru(k)
+            self.filter.add(k, now_ms)
+        with self._pending_lock:
+            self._pending.update(keys)
+        # One item, so the writer never sees the watermark without its rows
+        self._writer.put(('rows', [(k, now_ms) for k in keys], last_timestamp))
 
     def cleanup(self):
-        """Garbage collect old series."""
-        if time.time() - self.last_cleanup < 10:
+        # Run cleanup once hour; the writer drops the partitions
+        if time.time() - self.last_cleanup < 3600:
             return
-            
-        now = time.time()
-        keys_to_del = []
-        for k, s in self.series.items():
-            # If nothing happened for window_sec + buffer, delete
-            if now - s['last_ts'] > self.window_sec + 10:
-                keys_to_del.append(k)
-        
-        for k in keys_to_del:
-            del self.series[k]
-            
-        self.last_cleanup = now
+        cutoff_ms = int((time.time() - (TTL_HOURS * 3600)) * 1000)
+        self.filter.expire(cutoff_ms)
+        self._writer.put(('expire', cutoff_ms))
+        self.last_cleanup = time.time()
+
+    def _apply_writes(self, conn, items):
+        """One writer batch: key rows and the newest watermark in one commit, then any expiry."""
+        rows = []
+        expire_cutoff_ms = None
+        watermark = None
+        for item in items:
+            if item[0] == 'expire':
+                expire_cutoff_ms = item[1]
+            else:
+                _, item_rows, last_timestamp = item
+                rows.extend(item_rows)
+                if last_timestamp:
+                    watermark = max(watermark or 0, last_timestamp)
+
+        if rows:
+            start = time.perf_counter()
+            with conn:
+                self._insert_rows(conn, rows)
+                if watermark:
+                    self._save_watermark(conn, watermark)
+            self.max_commit_ms = max(self.max_commit_ms, (time.perf_counter() - start) * 1000)
+            self.commits += 1
+            self.rows_written += len(rows)
+            with self._pending_lock:
+                self._pending.difference_update(key for key, _ in rows)
+        if expire_cutoff_ms:
+            with conn:
+                dropped = self._drop_expired(conn, expire_cutoff_ms)
+            self.partitions_dropped += dropped
+            logger.info(f"DB cleanup completed ({dropped} partitions dropped)")
+
+    def _writes_failed(self, items, error):
+        """
+        The writer gave up on a batch: stop counting its keys as pending. They
+        stay in the LRU and filter, so this run still dedups them; only a
+        restart (or LRU eviction) can see them as new again. The watermark is
+        carried by the next batch that commits.
+        """
+        keys = [key for item in items if item[0] == 'rows' for key, _ in item[1]]
+        with self._pending_lock:
+            self._pending.difference_update(keys)
+        self.rows_failed += len(keys)
+
+    def get_stats(self):
+        return {
+            "pending_writes": self._writer.qsize(),
+            "pending_keys": len(self._pending),
+            "commits": self.commits,
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "write_retries": self._writer.retries,
+            "failed_batches": self._writer.failed_batches,
+            "partitions_dropped": self.partitions_dropped,
+            "max_commit_ms": round(self.max_commit_ms, 2),
+        }
+
+    def close(self):
+        """Flush pending writes, then stop the threads."""
+        self._writer.close()
+        self._reader.shutdown(wait=True)
+        self._read_conn.close()
 
 
 class PolymarketService:
-    def __init__(self):
-        self.persistence = TradePersistence()
-        self.aggregator = TradeAggregator(window_sec=60, min_alert_usd=500)
-        self.last_timestamp = 0
+    def __init__(self, db_path=DB_PATH, recorder=None, snapshot_path=None):
+        self.persistence = AsyncTradePersistence(db_path)
+        self.aggregator = TradeAggregator()
+        # Aggregator state survives restarts next to the seen-trades DB
+        self.snapshot_path = snapshot_path or os.path.splitext(db_path)[0] + ".aggregator"
+        self.last_snapshot = time.time()
+        self._snapshot_future = None
+        self._restore_aggregator()
+        # Watermark survives restarts, so gap recovery covers a short downtime;
+        # after a long one, start cold instead of paging back over hours of trades
+        self.last_timestamp = self.persistence.last_timestamp
+        if self.last_timestamp and time.time() - self.last_timestamp > RESUME_MAX_AGE:
+            logger.info(f"Saved watermark {self.last_timestamp} is older than {RESUME_MAX_AGE}s; starting cold")
+            self.last_timestamp = 0
         self.consecutive_errors = 0
+        self.unrecovered_polls = 0  # polls in a row whose gap recovery failed
         self.total_trades_processed = 0
+        self.stale_alerts_suppressed = 0  # alerts fired by trades too old to send
+        
+        # Incremental polling state: page size follows the observed arrival rate
+        self.page_limit = MAX_PAGE_LIMIT
+        self.arrival_rate = 0.0  # EWMA of new trades per poll
+        self.trade_rate = 0.0  # EWMA of new trades per second of trade time, sizes gap recovery
+        
+        # Push ingest hooks: a push source (see polymarket_ws) wakes the poller early;
+        # push_active only reports whether it is currently delivering
+        self.poll_wakeup = asyncio.Event()
+        self.last_poll_at = 0.0  # monotonic start of the latest poll
+        self.wakes_coalesced = 0  # wake-triggered polls held back by MIN_WAKE_INTERVAL
+        self.push_active = False
+        self.active_assets = OrderedDict()  # asset_id -> last trade ts
+        
+        # Optional TrafficRecorder (services/replay.py) capturing raw responses
+        self.recorder = recorder
+        self.running = True
+        
+        # Long-lived HTTP transport (created lazily inside the running loop)
+        self._session = None
+        self.last_request_timings = {}
+        self.http_stats = {
+            'requests': 0,
+            'connections_created': 0,
+            'connections_reused': 0,
+            'bytes_received': 0,  # wire bytes of responses whose size on the wire is known
+            'responses_unsized': 0,  # compressed without Content-Length: wire size unknown
+        }
         
         logger.info("PolymarketService initialized - using Data API with SQLite Persistence & Aggregation")
+
+    def _build_trace_config(self):
+        """Collect per-request timings (connect, TTFB) via aiohttp tracing."""
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            timings = ctx.trace_request_ctx
+            if timings is not None:
+                timings['start'] = time.perf_counter()
+                timings['connect_ms'] = 0.0
+                timings['reused'] = False
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_start = time.perf_counter()
+
+        async def on_connection_create_end(session, ctx, params):
+            self.http_stats['connections_created'] += 1
+            timings = ctx.trace_request_ctx
+            if timings is not None and hasattr(ctx, 'connect_start'):
+                timings['connect_ms'] = (time.perf_counter() - ctx.connect_start) * 1000
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.http_stats['connections_reused'] += 1
+            if ctx.trace_request_ctx is not None:
+                ctx.trace_request_ctx['reused'] = True
+
+        async def on_request_end(session, ctx, params):
+            # Fired once response headers are in: time-to-first-byte
+            timings = ctx.trace_request_ctx
+            if timings is not None and 'start' in timings:
+                timings['ttfb_ms'] = (time.perf_counter() - timings['start']) * 1000
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_start.append(on_connection_create_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_request_end.append(on_request_end)
+        return trace
+
+    async def _get_session(self):
+        """Return the shared pooled session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_SIZE,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=HTTP_KEEPALIVE_SEC,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                headers={'Accept-Encoding': ACCEPT_ENCODING},
+                trace_configs=[self._build_trace_config()],
+            )
+        return self._session
+
+    async def close(self):
+        """Close the HTTP session, finish recordings, write a final aggregator snapshot and close persistence."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._snapshot_future is not None:
+            await self._snapshot_future
+        if self.recorder:
+            await self.recorder.close()
+        state = self.aggregator.snapshot()
+        await asyncio.get_running_loop().run_in_executor(None, self._write_snapshot, state)
+        self.persistence.close()
+
+    def _restore_aggregator(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+        start = time.perf_counter()
+        try:
+            restored = self.aggregator.restore(read_snapshot(self.snapshot_path))
+        except Exception as e:
+            logger.error(f"Failed to restore aggregator snapshot: {e}")
+            return
+        logger.info(
+            f"Restored {restored} aggregator series from {self.snapshot_path} "
+            f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+
+    def _maybe_snapshot(self):
+        """Every SNAPSHOT_INTERVAL, capture aggregator state and write it from a worker thread."""
+        now = time.time()
+        if now - self.last_snapshot < SNAPSHOT_INTERVAL:
+            return
+        if self._snapshot_future is not None and not self._snapshot_future.done():
+            return  # previous write still running
+        self.last_snapshot = now
+        state = self.aggregator.snapshot()
+        self._snapshot_future = asyncio.get_running_loop().run_in_executor(None, self._write_snapshot, state)
+
+    def _write_snapshot(self, state):
+        try:
+            write_snapshot(self.snapshot_path, state)
+        except Exception as e:
+            logger.error(f"Failed to write aggregator snapshot: {e}")
         
     async def _fetch_recent_trades(self, limit=10000, offset=0, min_size=10):
-        """Fetch recent trades from Data API."""
+        """Fetch recent trades from Data API. Returns None if the request failed."""
         try:
             # Optimized API request with server-side filtering
             # Lowered min_size to 10 to capture shards for aggregation
             url = f"{DATA_API_URL}/trades?limit={limit}&offset={offset}&takerOnly=true&filterType=CASH&filterAmount={min_size}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    if resp.status == 200:
-                        trades = await resp.json()
-                        if trades and isinstance(trades, list):
-                            self.consecutive_errors = 0
-                            return trades
-                        return []
+            session = await self._get_session()
+            timings = {}
+            async with session.get(url, trace_request_ctx=timings) as resp:
+                if resp.status == 200:
+                    body_start = time.perf_counter()
+                    chunks = resp.content.iter_chunked(STREAM_CHUNK_SIZE)
+                    if self.recorder:
+                        chunks = self.recorder.tee(chunks, limit=limit, offset=offset)
+                    trades = await self._read_trades(chunks)
+                    body_bytes = resp.content.total_bytes
+                    encoding = resp.headers.get('Content-Encoding', 'identity')
+                    timings['body_ms'] = (time.perf_counter() - body_start) * 1000
+                    timings['total_ms'] = (time.perf_counter() - timings.get('start', body_start)) * 1000
+                    timings['wire_bytes'] = self._wire_bytes(resp.headers, encoding, body_bytes)
+                    timings['body_bytes'] = body_bytes
+                    timings['encoding'] = encoding
+                    timings.pop('start', None)
+                    self.last_request_timings = timings
+                    self.http_stats['requests'] += 1
+                    if timings['wire_bytes'] is None:
+                        self.http_stats['responses_unsized'] += 1
                     else:
-                        text = await resp.text()
-                        self.consecutive_errors += 1
-                        logger.error(f"Failed to fetch trades: {resp.status} - {text[:200]}")
-                        return []
+                        self.http_stats['bytes_received'] += timings['wire_bytes']
+                    
+                    self.consecutive_errors = 0
+                    return trades
+                else:
+                    text = await resp.text()
+                    self.consecutive_errors += 1
+                    logger.error(f"Failed to fetch trades: {resp.status} - {text[:200]}")
+                    return None
         except asyncio.TimeoutError:
             self.consecutive_errors += 1
             logger.error("Timeout fetching trades from Data API")
-            return []
+            return None
         except Exception as e:
             self.consecutive_errors += 1
             logger.error(f"Error fetching trades: {e}")
-            return []
+            return None
+
+    @staticmethod
+    def _wire_bytes(headers, encoding, body_bytes):
+        """
+        Body size on the wire, or None if unknown. total_bytes counts the
+        decoded body, so it is only the wire size for an identity encoding;
+        a compressed body without Content-Length (chunked) has no known size.
+        """
+        length = headers.get('Content-Length')
+        if length is not None:
+            return int(length)
+        if encoding == 'identity':
+            return body_bytes
+        return None
+
+    @staticmethod
+    async def _read_trades(chunks):
+        """Decode a /trades body, keeping only TRADE_FIELDS of each trade."""
+        trades = []
+        async for raw in iter_json_array(chunks):
+            if isinstance(raw, dict):
+                trades.append({k: raw[k] for k in TRADE_FIELDS if k in raw})
+        return trades
 
     async def poll_trades(self, callback, interval=POLL_INTERVAL):
         """
@@ -273,68 +947,98 @@ class PolymarketService:
         Uses pagination, SQLite persistence, and Aggregation.
         """
         logger.info(f"Starting trade polling (every {interval}s)...")
-        limit = 10000 
         
-        while True:
+        while self.running:
+            self.last_poll_at = time.monotonic()
             try:
-                offset = 0
-                max_pages = 5
+                limit = self.page_limit
+                cold_start = self.last_timestamp == 0
+                watermark = self.last_timestamp
+                gap_detected = False
+                recovered = True
                 trades_found_in_poll = 0
                 new_keys_batch = []
                 
-                for page in range(max_pages):
-                    trades = await self._fetch_recent_trades(limit=limit, offset=offset)
-                    
-                    if not trades:
-                        break
-                        
-                    # Sort by timestamp (oldest first)
-                    trades_sorted = sorted(trades, key=lambda t: t.get('timestamp', 0))
+                pages = []
+                trades = await self._fetch_recent_trades(limit=limit, offset=0)
+                fetch_failed = trades is None
+                if trades:
+                    pages.append(trades)
+                    # Robustness Check: the newest page lies entirely past the watermark
+                    if watermark > 0 and self._oldest_ts(trades) > watermark:
+                        gap_detected = True
+                        logger.info(f"Gap detected! Oldest fetch: {self._oldest_ts(trades)}, Last seen: {watermark}. Recovering deeper pages...")
+                        # Trades missing behind the page: its distance to the watermark at the usual rate
+                        expected = int((self._oldest_ts(trades) - watermark) * self.trade_rate * GAP_HEADROOM)
+                        deeper, recovered = await self._recover_gap(limit, limit, watermark, expected)
+                        pages.extend(deeper)
+                
+                merged = self._merge_pages(pages)
+                # Measured from the newest trade, so a replayed recording ages the same way
+                stale_before = (merged[-1][1].get('timestamp') or 0) - RESUME_MAX_AGE if merged else 0
+                new_keys = set(await self.persistence.filter_new_async([key for key, _ in merged]))
+                for key, trade in merged:
+                    if key not in new_keys:
+                        continue
                     
-                    oldest_trade_ts = trades_sorted[0].get('timestamp', 0)
-                    newest_trade_ts = trades_sorted[-1].get('timestamp', 0)
+                    # New trade confirmed
+                    self.persistence._add_to_lru(key)
+                    new_keys_batch.append(key)
+                    trades_found_in_poll += 1
+                    self.total_trades_processed += 1
+                    self._track_asset(trade)
                     
-                    for trade in trades_sorted:
-                        key = self.persistence.generate_key(trade)
-                        
-                        if self.persistence.is_seen(key):
+                    # Pass to Aggregator
+                    agg_trade = self.aggregator.process_trade(trade)
+                    if agg_trade:
+                        if (trade.get('timestamp') or stale_before) < stale_before:
+                            # Counted in its windows, but an alert this late is no use
+                            self.stale_alerts_suppressed += 1
                             continue
+                        # If aggregator triggered a series alert, send IT
+                        await callback(agg_trade)
                         
-                        # New trade confirmed
-                        self.persistence._add_to_lru(key)
-                        new_keys_batch.append(key)
-                        trades_found_in_poll += 1
-                        self.total_trades_processed += 1
-                        
-                        # Pass to Aggregator
-                        agg_trade = self.aggregator.process_trade(trade)
-                        if agg_trade:
-                            # If aggregator triggered a series alert, send IT
-                            await callback(agg_trade)
-                            
-                        # If you wanted to support single non-aggregated alerts for random big trades, 
-                        # you could add logic here. But per request, we focus on Aggregate >= 500.
-                        # Note: _fetch_recent_trades filters < 10. Aggregator filters sum < 500.
-                        # So a single trade of $1000 will be aggregated immediately (fills=1) and sent.
-
-                    # Update global last timestamp
+                    # If you wanted to support single non-aggregated alerts for random big trades, 
+                    # you could add logic here. But per request, we focus on Aggregate >= 500.
+                    # Note: _fetch_recent_trades filters < 10. Aggregator filters sum < 500.
+                    # So a single trade of $1000 will be aggregated immediately (fills=1) and sent.
+
+                # Update global last timestamp; an unrecovered gap keeps the old
+                # watermark so the next poll pages back over it again, until
+                # GAP_MAX_UNRECOVERED_POLLS say the missing depth is out of reach
+                if not recovered:
+                    self.unrecovered_polls += 1
+                    if self.unrecovered_polls < GAP_MAX_UNRECOVERED_POLLS:
+                        logger.warning(f"Gap not fully recovered - holding watermark at {self.last_timestamp}")
+                    else:
+                        logger.error(
+                            f"Gap not recovered in {self.unrecovered_polls} polls - trades between "
+                            f"{watermark} and {merged[0][1].get('timestamp', 0)} are lost; advancing the watermark"
+                        )
+                        recovered = True
+                if recovered:
+                    self.unrecovered_polls = 0
+                if recovered and merged:
+                    newest_trade_ts = merged[-1][1].get('timestamp', 0)
                     if newest_trade_ts > self.last_timestamp:
                         self.last_timestamp = newest_trade_ts
 
-                    # Robustness Check
-                    if self.last_timestamp > 0 and oldest_trade_ts > self.last_timestamp:
-                        logger.info(f"Gap detected! Oldest fetch: {oldest_trade_ts}, Last seen: {self.last_timestamp}. Paging deeper (offset {offset + limit})...")
-                        offset += limit
-                    else:
-                        break
-                
                 # Batch insert new keys to DB
                 if new_keys_batch:
-                    self.persistence.add_batch(new_keys_batch)
+                    self.persistence.add_batch(new_keys_batch, last_timestamp=self.last_timestamp)
                     logger.info(f"Processed {len(new_keys_batch)} new raw trades. Aggregator active.")
                 
+                if fetch_failed:
+                    pass  # a failed request says nothing about the arrival rate
+                elif not cold_start:
+                    self._update_page_limit(trades_found_in_poll, gap_detected, self.last_timestamp - watermark)
+                elif self.last_timestamp > 0:
+                    # Backlog is loaded; start incremental mode from the smallest page
+                    self.page_limit = MIN_PAGE_LIMIT
+                
                 # Aggregator Cleanup
                 self.aggregator.cleanup()
+                self._maybe_snapshot()
 
                 # Persistence Cleanup
                 self.persistence.cleanup()
@@ -346,14 +1050,180 @@ class PolymarketService:
             except Exception as e:
                 logger.error(f"Polling error: {e}")
             
-            await asyncio.sleep(interval)
+            await self._wait_next_poll(interval)
     
+    async def _wait_next_poll(self, interval):
+        """
+        Sleep until the next poll, or until a push source signals new trades.
+        Wakes (including those that arrived during the last poll) start at most
+        one poll per MIN_WAKE_INTERVAL, however many trade events come in.
+        """
+        try:
+            await asyncio.wait_for(self.poll_wakeup.wait(), timeout=interval)
+            delay = self.last_poll_at + MIN_WAKE_INTERVAL - time.monotonic()
+            if delay > 0 and self.running:
+                self.wakes_coalesced += 1
+                await asyncio.sleep(delay)
+        except asyncio.TimeoutError:
+            pass
+        self.poll_wakeup.clear()
+
+    def stop(self):
+        """Stop poll_trades after the current cycle."""
+        self.running = False
+        self.poll_wakeup.set()
+
+    def wake(self):
+        """Request an immediate poll (called by push sources)."""
+        self.poll_wakeup.set()
+
+    def _track_asset(self, trade):
+        asset = trade.get('asset')
+        if not asset:
+            return
+        self.active_assets[asset] = trade.get('timestamp', 0)
+        self.active_assets.move_to_end(asset)
+        if len(self.active_assets) > MAX_ACTIVE_ASSETS:
+            self.active_assets.popitem(last=False)
+
+    @staticmethod
+    def _oldest_ts(trades):
+        return min(t.get('timestamp', 0) for t in trades)
+
+    async def _recover_gap(self, start, size, watermark, expected=0):
+        """
+        Page back from offset `start` until a page reaches the watermark or comes
+        back short. If `expected` missing trades exceed one page, the first wave
+        covers them in up to GAP_FETCH_CONCURRENCY pages; otherwise recovery ramps
+        up from one `size` request. Returns (pages, recovered); recovered is False
+        if a page kept failing, so the caller holds the watermark.
+        """
+        pages = []
+        offset = start
+        width = 1
+        max_size = MAX_PAGE_LIMIT
+        grow = expected <= size
+        if not grow:
+            size = min(max(size, -(-expected // GAP_FETCH_CONCURRENCY)), MAX_PAGE_LIMIT)
+            width = min(-(-expected // size), GAP_FETCH_CONCURRENCY)
+        requested = 0
+        warned = False
+        
+        while requested < GAP_MAX_PAGES:
+            wave = []
+            for _ in range(min(width, GAP_MAX_PAGES - requested)):
+                wave.append((offset, size))
+                offset += size
+                if grow:
+                    size = min(size * 2, max_size)
+            grow = True
+            requested += len(wave)
+            results = await asyncio.gather(*(self._fetch_gap_page(o, n) for o, n in wave))
+            # Pages come back in offset order; the first one that ends the gap
+            # makes anything deeper (and any failure there) irrelevant
+            for (o, wanted), (trades, n) in zip(wave, results):
+                if trades is None:
+                    logger.error(f"Gap recovery failed at offset {o}, down to {n}-trade pages")
+                    return pages, False
+                if trades:
+                    pages.append(trades)
+                if len(trades) < n and (not trades or self._oldest_ts(trades) > watermark):
+                    # The API has no deeper history (or stops serving it) short of the watermark
+                    logger.error(f"Gap recovery ran out of history at offset {o + len(trades)}, short of "
+                                 f"the watermark ({watermark}); the trades in between are lost")
+                    return pages, True
+                if len(trades) < n or self._oldest_ts(trades) <= watermark:
+                    logger.info(f"Gap recovery fetched {len(pages)} extra pages ({o + len(trades)} trades deep)")
+                    return pages, True
+                if n < wanted:
+                    # Only a smaller page was served here: go on right behind it at that size
+                    offset, size, max_size, width = o + n, n, n, 1
+                    break
+            else:
+                width = min(width * 2, GAP_FETCH_CONCURRENCY)
+            if offset >= GAP_WARN_DEPTH and not warned:
+                warned = True
+                logger.warning(
+                    f"Gap recovery is {offset} trades deep and still newer than the watermark "
+                    f"({self._oldest_ts(pages[-1])} > {watermark}); still paging"
+                )
+        
+        # Deeper than one recovery may go: later polls would only find it deeper
+        logger.error(
+            f"Gap recovery gave up after {GAP_MAX_PAGES} pages ({offset} trades deep); trades between "
+            f"{watermark} and {self._oldest_ts(pages[-1])} are lost"
+        )
+        return pages, True
+
+    async def _fetch_gap_page(self, offset, limit):
+        """
+        Fetch one recovery page, retrying with backoff and halving the limit each
+        time, since the API refuses requests past the depth it serves.
+        Returns (trades, limit used); trades is None if every attempt failed.
+        """
+        delay = GAP_RETRY_DELAY
+        attempt = 0
+        while True:
+            trades = await self._fetch_recent_trades(limit=limit, offset=offset)
+            if trades is not None:
+                return trades, limit
+            attempt += 1
+            if attempt >= GAP_FETCH_RETRIES and limit <= MIN_PAGE_LIMIT:
+                return None, limit
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, GAP_RETRY_MAX_DELAY)
+            limit = max(limit // 2, MIN_PAGE_LIMIT)
+
+    def _merge_pages(self, pages):
+        """
+        Merge fetched pages into one (key, trade) list, oldest first.
+        Pages can overlap when new trades shift offsets between requests.
+        """
+        merged = {}
+        for trades in pages:
+            for trade in trades:
+                key = self.persistence.generate_key(trade)
+                if key not in merged:
+                    merged[key] = trade
+        return sorted(merged.items(), key=lambda kv: kv[1].get('timestamp', 0))
+
+    def _update_page_limit(self, new_trades, gap_detected, span_sec):
+        """
+        Size the next request to the observed arrival rate.
+        Grows quickly when a page was entirely new, shrinks gradually when quiet.
+        `span_sec` is how far the watermark advanced, for the per-second rate.
+        """
+        self.arrival_rate = (
+            ARRIVAL_EWMA_ALPHA * new_trades + (1 - ARRIVAL_EWMA_ALPHA) * self.arrival_rate
+        )
+        self.trade_rate = (
+            ARRIVAL_EWMA_ALPHA * new_trades / max(span_sec, 1) + (1 - ARRIVAL_EWMA_ALPHA) * self.trade_rate
+        )
+        if gap_detected:
+            limit = self.page_limit * 2
+        else:
+            limit = int(self.arrival_rate * PAGE_HEADROOM)
+        self.page_limit = max(MIN_PAGE_LIMIT, min(MAX_PAGE_LIMIT, limit))
+
     def get_stats(self):
         """Get service statistics."""
         return {
             "total_processed": self.total_trades_processed,
+            "stale_alerts_suppressed": self.stale_alerts_suppressed,
             "lru_size": len(self.persistence.lru),
-            "active_series": len(self.aggregator.series),
+            "filter": dict(
+                self.persistence.filter.get_stats(),
+                skips=self.persistence.filter_skips,
+                false_positives=self.persistence.filter_false_positives,
+            ),
+            "db": self.persistence.get_stats(),
+            "aggregator": self.aggregator.get_stats(),
             "last_timestamp": self.last_timestamp,
-            "consecutive_errors": self.consecutive_errors
+            "page_limit": self.page_limit,
+            "arrival_rate": round(self.arrival_rate, 1),
+            "trade_rate": round(self.trade_rate, 1),
+            "consecutive_errors": self.consecutive_errors,
+            "push_active": self.push_active,
+            "wakes_coalesced": self.wakes_coalesced,
+            "http": dict(self.http_stats, last_request=self.last_request_timings)
         }
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+import time
+
+import websockets
+
+from config import MARKET_WS_URL
+
+logger = logging.getLogger(__name__)
+
+# Push ingest configuration
+WS_QUIET_SEC = 20  # no trade event for this long -> treat socket as quiet, fall back to polling
+WS_PING_INTERVAL = 10  # CLOB market channel expects an application-level PING
+WS_RECONNECT_MIN = 1
+WS_RECONNECT_MAX = 60
+WS_ASSET_WAIT = 5  # how often to check for assets before the first subscription
+
+# Market channel events that mean a trade just printed
+TRADE_EVENTS = ('last_trade_price', 'trade')
+
+
+class MarketStream:
+    """
+    Push-based ingest from the CLOB market WebSocket channel.
+
+    The market channel only carries asset/price/size for each print, not the
+    wallet and market metadata our alerts need. So instead of producing trades
+    itself, the stream wakes PolymarketService.poll_trades as soon as a trade
+    prints on a subscribed asset; the same dedup -> aggregate -> callback path
+    then runs immediately instead of waiting for the next poll interval.
+
+    Wakes only ever shorten the wait: the poller still polls at least every
+    POLL_INTERVAL, so a stream that silently stops delivering costs nothing.
+    When the socket drops or carries no trade event for WS_QUIET_SEC, the
+    stream is marked inactive and the poller is woken once to pick up
+    anything the stream may have missed. Subscriptions follow the poller's active assets, so assets it
+    stops tracking are unsubscribed.
+    Heartbeat replies and book/price updates keep the socket open but do not
+    count: only a trade proves the subscription is delivering what we need.
+    """
+
+    def __init__(self, service, url=MARKET_WS_URL, quiet_sec=WS_QUIET_SEC, ping_interval=WS_PING_INTERVAL):
+        self.service = service
+        self.url = url
+        self.quiet_sec = quiet_sec
+        self.ping_interval = ping_interval
+        self.subscribed = set()
+        self.last_trade_at = 0.0
+        self.reconnects = 0
+        self.trade_events = 0
+
+    async def run(self):
+        """Connect, subscribe and listen forever, reconnecting with backoff."""
+        logger.info(f"Starting market stream ({self.url})...")
+        backoff = WS_RECONNECT_MIN
+
+        while True:
+            assets = list(self.service.active_assets)
+            if not assets:
+                # Nothing to subscribe to until the poller has seen some trades
+                await asyncio.sleep(WS_ASSET_WAIT)
+                continue
+
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    backoff = WS_RECONNECT_MIN
+                    await self._listen(ws, assets)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Market stream disconnected: {e}")
+            finally:
+                self._set_push_active(False)
+                self.subscribed.clear()
+
+            self.reconnects += 1
+            # Resume: one poll right away covers anything missed while disconnected
+            self.service.wake()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, WS_RECONNECT_MAX)
+
+    async def _listen(self, ws, assets):
+        await ws.send(json.dumps({"type": "market", "assets_ids": assets}))
+        self.subscribed.update(assets)
+        self.last_trade_at = time.time()
+        logger.info(f"Market stream subscribed to {len(assets)} assets")
+
+        heartbeat = asyncio.create_task(self._heartbeat(ws))
+        try:
+            while True:
+                # Wait no longer than the rest of the quiet window; other frames
+                # (PONG, book updates) must not keep the stream looking live
+                remaining = self.last_trade_at + self.quiet_sec - time.time()
+                if remaining <= 0:
+                    # Quiet socket: let the poller carry the load until trades resume
+                    self._set_push_active(False)
+                    remaining = self.quiet_sec
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    continue
+
+                if self._handle_message(raw):
+                    self.last_trade_at = time.time()
+                    self._set_push_active(True)
+                await self._sync_assets(ws)
+        finally:
+            heartbeat.cancel()
+            # Collect the heartbeat's outcome (a failed send on a dropped socket)
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _heartbeat(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send("PING")
+
+    async def _sync_assets(self, ws):
+        """Follow the poller's active assets: subscribe new ones, drop those it no longer tracks."""
+        active = self.service.active_assets
+        new_assets = [a for a in active if a not in self.subscribed]
+        if new_assets:
+            await ws.send(json.dumps({"assets_ids": new_assets, "operation": "subscribe"}))
+            self.subscribed.update(new_assets)
+            logger.info(f"Market stream subscribed to {len(new_assets)} more assets")
+        stale_assets = [a for a in self.subscribed if a not in active]
+        if stale_assets:
+            await ws.send(json.dumps({"assets_ids": stale_assets, "operation": "unsubscribe"}))
+            self.subscribed.difference_update(stale_assets)
+
+    def _handle_message(self, raw):
+        """Wake the poller for trade events in `raw`; returns how many there were."""
+        if raw == "PONG":
+            return 0
+        try:
+            data = json.loads(raw)
+        except (TypeError, ValueError):
+            return 0
+
+        events = data if isinstance(data, list) else [data]
+        trades = sum(
+            1 for event in events
+            if isinstance(event, dict) and event.get('event_type') in TRADE_EVENTS
+        )
+        if trades:
+            self.trade_events += trades
+            self.service.wake()
+        return trades
+
+    def _set_push_active(self, active):
+        if self.service.push_active != active:
+            logger.info(f"Market stream {'active' if active else 'quiet'}")
+        was_active = self.service.push_active
+        self.service.push_active = active
+        if was_active and not active:
+            # Poll now for anything the stream missed before it went quiet
+            self.service.wake()
+
+    def get_stats(self):
+        """Get stream statistics."""
+        return {
+            "subscribed_assets": len(self.subscribed),
+            "trade_events": self.trade_events,
+            "reconnects": self.reconnects,
+            "last_trade_at": self.last_trade_at,
+            "push_active": self.service.push_active,
+        }
@@ -0,0 +1,146 @@
+import asyncio
+import gzip
+import logging
+import os
+import time
+
+from services.polymarket import PolymarketService, STREAM_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Recording file name: <unix_ms>_<offset>_<limit>.json.gz
+RECORDING_SUFFIX = ".json.gz"
+
+
+class TrafficRecorder:
+    """
+    Capture raw /trades response bodies as gzip files, one per response.
+
+    Chunks are buffered while the response streams through; once it is
+    complete the body is compressed and written from a worker thread, so
+    recording adds no disk or gzip work to the event loop. Responses cut off
+    mid-stream are not written. close() waits for writes still running.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files_written = 0
+        self._writes = set()
+        os.makedirs(directory, exist_ok=True)
+
+    async def tee(self, chunks, limit, offset):
+        """Pass response chunks through unchanged, then write the whole body to disk."""
+        name = f"{int(time.time() * 1000)}_{offset}_{limit}{RECORDING_SUFFIX}"
+        path = os.path.join(self.directory, name)
+        body = []
+        async for chunk in chunks:
+            body.append(chunk)
+            yield chunk
+        future = asyncio.get_running_loop().run_in_executor(None, self._write, path, body)
+        self._writes.add(future)
+        future.add_done_callback(self._writes.discard)
+
+    def _write(self, path, body):
+        try:
+            with gzip.open(path, 'wb', compresslevel=5) as f:
+                f.write(b"".join(body))
+        except Exception as e:
+            logger.error(f"Failed to write recording {path}: {e}")
+            return
+        self.files_written += 1
+
+    async def close(self):
+        """Wait for recordings still being written."""
+        if self._writes:
+            await asyncio.gather(*self._writes)
+
+
+def load_recording(directory):
+    """Return [(recorded_at_sec, offset, limit, path)] sorted by capture time."""
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(RECORDING_SUFFIX):
+            continue
+        try:
+            ts_ms, offset, limit = name[:-len(RECORDING_SUFFIX)].split('_')
+            entries.append((int(ts_ms) / 1000, int(offset), int(limit), os.path.join(directory, name)))
+        except ValueError:
+            logger.warning(f"Skipping unrecognised recording file: {name}")
+    entries.sort()
+    return entries
+
+
+async def _file_chunks(path):
+    with gzip.open(path, 'rb') as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def group_polls(entries):
+    """
+    Split load_recording() entries into recorded polls, each starting at an
+    offset-0 response. Entries before the first one (a poll already under
+    way when recording started) are dropped.
+    """
+    polls = []
+    for entry in entries:
+        if entry[1] == 0:
+            polls.append([entry])
+        elif polls:
+            polls[-1].append(entry)
+    return polls
+
+
+class ReplayService(PolymarketService):
+    """
+    PolymarketService fed from a recording instead of the Data API.
+
+    Every offset-0 request starts the next recorded poll; each request is
+    served by its offset and limit from that poll's responses, so the
+    replayed poller may page through them differently than the recorded one
+    did. Offsets past what the poll recorded come back empty. Trades go
+    through the same decode, dedup and aggregation path as production.
+    Polls are paced by the recorded gaps divided by `speed` (speed=0 replays
+    as fast as possible), and polling stops once the recording is exhausted.
+    """
+
+    def __init__(self, directory, db_path, speed=1.0):
+        super().__init__(db_path=db_path)
+        entries = load_recording(directory)
+        self.polls = group_polls(entries)
+        self.speed = speed
+        self.position = 0  # recorded polls started so far
+        self.current = []  # trades of the current recorded poll, newest first
+        self.responses_served = 0
+        logger.info(f"Loaded {len(entries)} recorded responses ({len(self.polls)} polls) from {directory}")
+
+    async def _fetch_recent_trades(self, limit=10000, offset=0, min_size=10):
+        if offset == 0:
+            if self.position >= len(self.polls):
+                self.current = []
+                return []
+            self.current = await self._load_poll(self.polls[self.position])
+            self.position += 1
+        self.responses_served += 1
+        return self.current[offset:offset + limit]
+
+    async def _load_poll(self, poll):
+        """Trades of one recorded poll in offset order, up to the first offset it did not record."""
+        trades = []
+        for _, offset, _, path in sorted(poll, key=lambda entry: entry[1]):
+            if offset > len(trades):
+                break
+            page = await self._read_trades(_file_chunks(path))
+            trades.extend(page[len(trades) - offset:])
+        return trades
+
+    async def _wait_next_poll(self, interval):
+        if self.position >= len(self.polls):
+            self.running = False
+            return
+        if self.speed > 0 and self.position > 0:
+            gap = self.polls[self.position][0][0] - self.polls[self.position - 1][0][0]
+            await asyncio.sleep(max(0.0, gap) / self.speed)
@@ -1,16 +1,27 @@
 from aiogram import Bot, Dispatcher, types, F
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
 from aiogram.filters import Command
 from aiogram.types import (
     InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery,
     ReplyKeyboardMarkup, KeyboardButton
 )
+import asyncio
+import heapq
 import logging
-from config import TELEGRAM_BOT_TOKEN, FILTERS, OWNER_ID
+import time
+from collections import deque
+from config import TELEGRAM_BOT_TOKEN, TELEGRAM_API_URL, FILTERS, OWNER_ID
+from core.filters import get_tier_priority
 from core.localization import get_text, get_trade_level_name
+from core.subscribers import SubscriberIndex
+from services.pipeline import StatsReporter
 
 logger = logging.getLogger(__name__)
 
-bot = Bot(token=TELEGRAM_BOT_TOKEN)
+session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+bot = Bot(token=TELEGRAM_BOT_TOKEN, session=session)
 dp = Dispatcher()
 
 # Settings file path
@@ -31,10 +42,11 @@ def load_settings():
                 statuses = {int(k): v for k, v in data.get('statuses', {}).items()}
                 usernames = {int(k): v for k, v in data.get('usernames', {}).items()}
                 probabilities = {int(k): v for k, v in data.get('probabilities', {}).items()}
-                return filters, categories, languages, statuses, usernames, probabilities
+                digests = {int(k): v for k, v in data.get('digests', {}).items()}
+                return filters, categories, languages, statuses, usernames, probabilities, digests
     except Exception as e:
         logger.error(f"Error loading settings: {e}")
-    return {}, {}, {}, {}, {}, {}
+    return {}, {}, {}, {}, {}, {}, {}
 
 def save_settings():
     """Save user settings to file."""
@@ -45,7 +57,8 @@ def save_settings():
             'languages': {str(k): v for k, v in user_languages.items()},
             'statuses': {str(k): v for k, v in user_statuses.items()},
             'usernames': {str(k): v for k, v in user_usernames.items()},
-            'probabilities': {str(k): v for k, v in user_probabilities.items()}
+            'probabilities': {str(k): v for k, v in user_probabilities.items()},
+            'digests': {str(k): v for k, v in user_digests.items()}
         }
         with open(SETTINGS_FILE, 'w') as f:
             json.dump(data, f)
@@ -53,7 +66,8 @@ def save_settings():
         logger.error(f"Error saving settings: {e}")
 
 # Load settings on startup
-user_filters, user_categories, user_languages, user_statuses, user_usernames, user_probabilities = load_settings()
+(user_filters, user_categories, user_languages, user_statuses, user_usernames, user_probabilities,
+ user_digests) = load_settings()
 
 # Probability filter options: (min, max) or None for any
 PROBABILITY_OPTIONS = {
@@ -63,6 +77,9 @@ PROBABILITY_OPTIONS = {
     '10_90': (0.10, 0.90),
 }
 
+# Digest windows in seconds; 0 sends every alert on its own
+DIGEST_OPTIONS = (0, 60, 120, 300)
+
 def get_default_categories():
     """Default category preferences - all enabled."""
     return {'all': True, 'other': True, 'crypto': True, 'sports': True}
@@ -87,6 +104,8 @@ def ensure_user_exists(chat_id):
     
     if chat_id not in user_probabilities:
         user_probabilities[chat_id] = 'any'  # Default: no probability filter
+    
+    index_user(chat_id)
 
 def get_user_lang(chat_id):
     """Get user's language preference."""
@@ -108,7 +127,8 @@ def get_main_keyboard(chat_id):
         keyboard=[
             [KeyboardButton(text=get_text(lang, 'btn_amount')),
              KeyboardButton(text=get_text(lang, 'btn_categories')),
-             KeyboardButton(text=get_text(lang, 'btn_probability'))],
+             KeyboardButton(text=get_text(lang, 'btn_probability')),
+             KeyboardButton(text=get_text(lang, 'btn_digest'))],
             [KeyboardButton(text=btn_toggle),
              KeyboardButton(text=get_text(lang, 'btn_language')),
              KeyboardButton(text=get_text(lang, 'btn_about'))]
@@ -137,6 +157,23 @@ def get_amount_keyboard(chat_id):
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+def get_digest_keyboard(chat_id):
+    """Create inline keyboard for digest window selection."""
+    lang = get_user_lang(chat_id)
+    current = user_digests.get(chat_id, 0)
+    
+    buttons = []
+    for seconds in DIGEST_OPTIONS:
+        if seconds:
+            label = get_text(lang, 'digest_window', minutes=seconds // 60)
+        else:
+            label = get_text(lang, 'digest_off')
+        text = f"✅ {label}" if seconds == current else label
+        buttons.append([InlineKeyboardButton(text=text, callback_data=f"digest_{seconds}")])
+    
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
 def get_probability_keyboard(chat_id):
     """Create inline keyboard for probability filter selection."""
     lang = get_user_lang(chat_id)
@@ -201,6 +238,7 @@ async def cmd_start(message: types.Message):
     ensure_user_exists(chat_id)
     # Force active on start command
     user_statuses[chat_id] = True
+    index_user(chat_id)
     save_settings()
     
     lang = get_user_lang(chat_id)
@@ -250,6 +288,19 @@ async def cmd_probability(message: types.Message):
         reply_markup=get_probability_keyboard(chat_id)
     )
 
+@dp.message(Command("digest"))
+async def cmd_digest(message: types.Message):
+    """Show digest menu."""
+    chat_id = message.chat.id
+    ensure_user_exists(chat_id)
+    lang = get_user_lang(chat_id)
+        
+    await message.answer(
+        get_text(lang, 'digest_menu_title'),
+        parse_mode="Markdown",
+        reply_markup=get_digest_keyboard(chat_id)
+    )
+
 # Text handlers for bottom keyboard buttons
 @dp.message(F.text.in_(["💰 Сумма сделки", "💰 Trade Amount"]))
 async def btn_amount(message: types.Message):
@@ -266,6 +317,11 @@ async def btn_probability(message: types.Message):
     """Handle Probability button press."""
     await cmd_probability(message)
 
+@dp.message(F.text.in_(["📬 Дайджест", "📬 Digest"]))
+async def btn_digest(message: types.Message):
+    """Handle Digest button press."""
+    await cmd_digest(message)
+
 @dp.message(F.text.in_(["▶️ Запустить", "▶️ Start", "⏸️ Остановить", "⏸️ Stop"]))
 async def btn_start_stop(message: types.Message):
     """Handle Start/Stop toggle button."""
@@ -276,6 +332,7 @@ async def btn_start_stop(message: types.Message):
     # Toggle state
     new_state = not active
     user_statuses[chat_id] = new_state
+    index_user(chat_id)
     save_settings()
     
     msg_key = 'bot_started' if new_state else 'bot_stopped'
@@ -323,6 +380,7 @@ async def callback_filter(callback: CallbackQuery):
     min_value = int(callback.data.replace("filter_", ""))
     
     user_filters[chat_id] = min_value
+    index_user(chat_id)
     save_settings()
     
     # Show confirmation and refresh keyboard
@@ -342,6 +400,7 @@ async def callback_probability(callback: CallbackQuery):
     prob_key = callback.data.replace("prob_", "")
     
     user_probabilities[chat_id] = prob_key
+    index_user(chat_id)
     save_settings()
     
     # Get display text for the selected range
@@ -354,6 +413,28 @@ async def callback_probability(callback: CallbackQuery):
     )
     logger.info(f"User {chat_id} set probability filter to {prob_key}")
 
+@dp.callback_query(F.data.startswith("digest_"))
+async def callback_digest(callback: CallbackQuery):
+    """Handle digest window selection."""
+    chat_id = callback.message.chat.id
+    ensure_user_exists(chat_id)
+    lang = get_user_lang(chat_id)
+    seconds = int(callback.data.replace("digest_", ""))
+    
+    if seconds:
+        user_digests[chat_id] = seconds
+    else:
+        user_digests.pop(chat_id, None)
+    save_settings()
+    
+    if seconds:
+        text = get_text(lang, 'digest_set', minutes=seconds // 60)
+    else:
+        text = get_text(lang, 'digest_set_off')
+    await callback.answer(get_text(lang, 'filter_toast'))
+    await callback.message.edit_text(text, parse_mode="Markdown")
+    logger.info(f"User {chat_id} set digest window to {seconds}s")
+
 @dp.callback_query(F.data.startswith("cat_"))
 async def callback_category(callback: CallbackQuery):
     """Handle category toggle callback."""
@@ -397,6 +478,7 @@ async def callback_category(callback: CallbackQuery):
         prefs['all'] = prefs.get('other', False) and prefs.get('crypto', False) and prefs.get('sports', False)
     
     user_categories[chat_id] = prefs
+    index_user(chat_id)
     
     # Save settings on EVERY click to avoid state loss/desync
     save_settings()
@@ -426,6 +508,33 @@ def is_user_active(chat_id):
     return user_statuses.get(chat_id, True)
 
 
+# ============ ALERT ROUTING ============
+
+# Users with a threshold (the ones handle_trade alerts), bucketed for fan-out
+subscriber_index = SubscriberIndex(PROBABILITY_OPTIONS)
+
+def index_user(chat_id):
+    """Refresh a user's routing entry; call after any of their settings change."""
+    if chat_id in user_filters:
+        subscriber_index.update(
+            chat_id,
+            user_filters[chat_id],
+            is_user_active(chat_id),
+            get_user_categories(chat_id),
+            user_probabilities.get(chat_id, 'any'),
+        )
+    else:
+        subscriber_index.remove(chat_id)
+
+def rebuild_subscriber_index():
+    """Index every user from the settings dicts (startup, bulk edits)."""
+    subscriber_index.clear()
+    for chat_id in user_filters:
+        index_user(chat_id)
+
+rebuild_subscriber_index()
+
+
 # ============ ADMIN COMMANDS (Owner Only) ============
 
 @dp.message(Command("stats"))
@@ -475,6 +584,11 @@ async def cmd_stats(message: types.Message):
 🇬🇧 EN: {en_users}
 """
     
+    # Pipeline, delivery and ingest counters registered by main
+    runtime_lines = runtime_stats.lines()
+    if runtime_lines:
+        msg += "\n⚙️ **Система:**\n```\n" + "\n".join(runtime_lines)[:3000] + "\n```"
+    
     await message.answer(msg, parse_mode="Markdown")
 
 
@@ -534,10 +648,443 @@ async def start_telegram():
     logger.info("Starting Telegram Bot Polling...")
     await dp.start_polling(bot)
 
-async def send_trade_alert(chat_id, message_text):
+# ============ DELIVERY ============
+
+# Bot API flood limits (https://core.telegram.org/bots/faq#broadcasting-to-users)
+GLOBAL_RATE = 30  # messages/sec across all chats
+PRIVATE_CHAT_RATE = 1  # messages/sec to one user
+GROUP_CHAT_RATE = 20 / 60  # messages/sec to one group or channel
+DELIVERY_WORKERS = 16  # concurrent sendMessage requests
+DELIVERY_MAX_PENDING = 10000  # accepted but undelivered messages before submit() blocks
+DELIVERY_MAX_ATTEMPTS = 3  # tries per message on network/server errors
+RETRY_BACKOFF = 1.0  # seconds before the first retry, doubled each time
+CHAT_BUCKETS_MAX = 50000  # idle per-chat buckets are pruned beyond this
+LATENCY_SAMPLES = 10000  # recent delivery latencies kept for percentiles
+# Seconds a low-tier alert may wait before it is dropped as stale; tiers not listed never expire
+ALERT_TTL = {500: 120, 2000: 300, 5000: 600}
+DIGEST_MAX_LEVEL = 2000  # alerts up to this tier may be coalesced; larger ones always go out at once
+MESSAGE_MAX_LEN = 4096  # Bot API limit, in UTF-16 code units
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """Seconds until a token is available (0 if one is now)."""
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def is_full(self):
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+    async def acquire(self):
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                self.tokens -= 1
+                return
+            await asyncio.sleep(wait)
+
+
+class Outbound:
+    __slots__ = ('msg_id', 'chat_id', 'text', 'level', 'priority', 'queued_at', 'attempts')
+
+    def __init__(self, msg_id, chat_id, text, level, queued_at):
+        self.msg_id = msg_id
+        self.chat_id = chat_id
+        self.text = text
+        self.level = level  # alert tier threshold, None for other messages
+        self.priority = get_tier_priority(level)
+        self.queued_at = queued_at  # wall clock, so TTLs hold across restarts
+        self.attempts = 0
+
+
+class DeliveryEngine:
+    """
+    Concurrent, rate-limited, priority-ordered sender.
+
+    Each chat has a heap of pending messages ordered by alert tier (largest
+    trades first, then arrival) and its own token bucket (1/s for users,
+    20/min for groups and channels). A chat sits in the `ready` priority
+    queue, keyed by its best message, only when that message may go out
+    now; chats that must wait are put back with call_later, so workers
+    never sleep on a per-chat limit. Workers then take a token from the
+    global bucket and call `send(chat_id, text)`. A RetryAfter defers the
+    chat by retry_after seconds; network and 5xx errors are retried with
+    backoff. Low-tier alerts older than their ALERT_TTL are dropped.
+
+    With a journal (OutboxJournal), every accepted message is recorded
+    until it is finished, and start() replays what the last run left.
+    """
+
+    def __init__(self, send, workers=DELIVERY_WORKERS, global_rate=GLOBAL_RATE,
+                 private_rate=PRIVATE_CHAT_RATE, group_rate=GROUP_CHAT_RATE,
+                 max_pending=DELIVERY_MAX_PENDING, max_attempts=DELIVERY_MAX_ATTEMPTS, ttl=ALERT_TTL):
+        self.send = send
+        self.worker_count = workers
+        self.global_bucket = TokenBucket(global_rate)  # no burst: Telegram counts per rolling second
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.ttl = ttl
+        self.journal = None
+        self.next_id = 1
+        self.chat_buckets = {}
+        self.chats = {}  # chat_id -> heap of (priority, msg_id, Outbound), present while the chat has work
+        self.ready = asyncio.PriorityQueue()  # (priority, msg_id, chat_id) for chats that may send now
+        self.ready_keys = {}  # chat_id -> (priority, msg_id) of its live `ready` entry; others are stale
+        self.timers = {}  # chat_id -> TimerHandle for chats waiting on their bucket
+        self.room = asyncio.Event()  # set while pending < max_pending
+        self.room.set()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.tasks = []
+        self.pending = 0
+        self.sent = 0
+        self.failed = 0
+        self.expired = 0
+        self.retries = 0
+        self.retry_after_hits = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # queued -> delivered, seconds
+
+    def start(self, journal=None):
+        """Start workers; with a journal, first replay what the previous run left pending."""
+        self.journal = journal
+        if journal:
+            self.next_id = max(self.next_id, journal.next_id)
+            self._replay(journal.take_pending())
+        for i in range(self.worker_count):
+            self.tasks.append(asyncio.create_task(self._worker(), name=f"delivery-{i}"))
+        logger.info(f"Delivery engine started ({self.worker_count} workers)")
+
+    def _replay(self, rows):
+        now = time.time()
+        for msg_id, chat_id, text, level, queued_at in rows:
+            msg = Outbound(msg_id, chat_id, text, level, queued_at)
+            if self._is_stale(msg, now):
+                self.expired += 1
+                self.journal.remove(msg_id)
+            else:
+                self._enqueue(msg)
+        if rows:
+            logger.info(f"Replayed {self.pending} journaled messages ({len(rows) - self.pending} expired)")
+
+    async def submit(self, chat_id, text, level=None):
+        """
+        Accept a message for delivery; `level` is the alert tier threshold.
+        Blocks only while max_pending messages are in flight.
+        """
+        while self.pending >= self.max_pending:
+            self.room.clear()
+            await self.room.wait()
+        msg = Outbound(self.next_id, chat_id, text, level, time.time())
+        self.next_id += 1
+        if self.journal:
+            self.journal.append(msg.msg_id, chat_id, text, level, msg.queued_at)
+        self._enqueue(msg)
+
+    def hold(self, chat_id, text, level=None):
+        """
+        Journal a message kept outside the engine for now (see DigestBuffer);
+        returns an id for release(). After a crash it is replayed like any
+        other journaled message.
+        """
+        msg_id = self.next_id
+        self.next_id += 1
+        if self.journal:
+            self.journal.append(msg_id, chat_id, text, level, time.time())
+        return msg_id
+
+    def release(self, msg_ids):
+        """Drop held messages from the journal once their content has been submitted."""
+        if self.journal:
+            for msg_id in msg_ids:
+                self.journal.remove(msg_id)
+
+    def _enqueue(self, msg):
+        self.pending += 1
+        self.idle.clear()
+        heap = self.chats.get(msg.chat_id)
+        if heap is None:
+            self.chats[msg.chat_id] = [(msg.priority, msg.msg_id, msg)]
+            self._schedule(msg.chat_id, self._chat_bucket(msg.chat_id).delay())
+        else:
+            # An idle chat is already scheduled, a busy one reschedules when its send finishes;
+            # a chat waiting in `ready` is re-queued at the new message's priority if that is higher
+            heapq.heappush(heap, (msg.priority, msg.msg_id, msg))
+            key = self.ready_keys.get(msg.chat_id)
+            if key is not None and (msg.priority, msg.msg_id) < key:
+                self._make_ready(msg.chat_id)
+
+    def _is_stale(self, msg, now):
+        ttl = self.ttl.get(msg.level)
+        return ttl is not None and now - msg.queued_at > ttl
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= CHAT_BUCKETS_MAX:
+                self._prune_buckets()
+            try:
+                is_group = int(chat_id) < 0  # groups, supergroups and channels
+            except ValueError:
+                is_group = True  # @channelusername
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.group_rate if is_group else self.private_rate)
+        return bucket
+
+    def _prune_buckets(self):
+        """Drop buckets of idle chats that have fully refilled; they carry no state."""
+        for chat_id in [c for c, b in self.chat_buckets.items() if c not in self.chats and b.is_full()]:
+            del self.chat_buckets[chat_id]
+
+    def _schedule(self, chat_id, delay):
+        if delay <= 0:
+            self._make_ready(chat_id)
+        else:
+            self.timers[chat_id] = asyncio.get_running_loop().call_later(delay, self._wake, chat_id)
+
+    def _wake(self, chat_id):
+        self.timers.pop(chat_id, None)
+        self._make_ready(chat_id)
+
+    def _make_ready(self, chat_id):
+        priority, msg_id, _ = self.chats[chat_id][0]
+        self.ready_keys[chat_id] = (priority, msg_id)
+        self.ready.put_nowait((priority, msg_id, chat_id))
+
+    def _finish(self, chat_id, msg):
+        """Retire `msg` (sent, failed or expired) and reschedule its chat."""
+        if self.journal:
+            self.journal.remove(msg.msg_id)
+        self.pending -= 1
+        if self.pending < self.max_pending:
+            self.room.set()
+        if self.chats[chat_id]:
+            self._schedule(chat_id, self._chat_bucket(chat_id).delay())
+        else:
+            del self.chats[chat_id]
+            if not self.pending:
+                self.idle.set()
+
+    async def _worker(self):
+        while True:
+            priority, msg_id, chat_id = await self.ready.get()
+            if self.ready_keys.get(chat_id) != (priority, msg_id):
+                continue  # superseded by a higher-priority entry for the same chat
+            del self.ready_keys[chat_id]
+            heap = self.chats[chat_id]
+            if self._is_stale(heap[0][2], time.time()):
+                self.expired += 1
+                self._finish(chat_id, heapq.heappop(heap)[2])
+                continue
+            bucket = self._chat_bucket(chat_id)
+            wait = bucket.delay()
+            if wait > 0:
+                self._schedule(chat_id, wait)
+                continue
+            # Take the message out while it is in flight; the chat stays busy until _finish
+            msg = heapq.heappop(heap)[2]
+            await self.global_bucket.acquire()
+            bucket.consume()
+            retry_in = await self._attempt(msg)
+            if retry_in is not None:
+                heapq.heappush(heap, (msg.priority, msg.msg_id, msg))
+                self._schedule(chat_id, retry_in)
+                continue
+            self._finish(chat_id, msg)
+
+    async def _attempt(self, msg):
+        """Send once. Returns seconds to wait before retrying, or None when done (sent or given up)."""
+        try:
+            await self.send(msg.chat_id, msg.text)
+        except TelegramRetryAfter as e:
+            self.retry_after_hits += 1
+            logger.warning(f"Flood control for chat {msg.chat_id}, retrying in {e.retry_after}s")
+            return e.retry_after
+        except (TelegramNetworkError, TelegramServerError) as e:
+            msg.attempts += 1
+            if msg.attempts < self.max_attempts:
+                self.retries += 1
+                return RETRY_BACKOFF * 2 ** (msg.attempts - 1)
+            self.failed += 1
+            logger.error(f"Failed to send Telegram message to {msg.chat_id} after {msg.attempts} attempts: {e}")
+            return None
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Failed to send Telegram message to {msg.chat_id}: {e}")
+            return None
+        self.sent += 1
+        self.latencies.append(time.time() - msg.queued_at)
+        return None
+
+    async def close(self, timeout=10):
+        """Deliver what is pending (up to `timeout`), then stop workers and flush the journal."""
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            if self.journal:
+                logger.warning(f"Delivery drain timed out; {self.pending} messages stay journaled for the next start")
+            else:
+                logger.warning(f"Delivery drain timed out; dropping {self.pending} messages")
+        for handle in self.timers.values():
+            handle.cancel()
+        self.timers.clear()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.journal:
+            self.journal.close()
+
+    def get_stats(self):
+        """Delivery counters and queued -> delivered latency percentiles (ms) over recent messages."""
+        lat = sorted(self.latencies)
+
+        def pct(p):
+            return round(lat[min(len(lat) - 1, int(len(lat) * p))] * 1000, 1) if lat else 0.0
+
+        stats = {
+            "workers": self.worker_count,
+            "pending": self.pending,
+            "chats_waiting": len(self.chats),
+            "sent": self.sent,
+            "failed": self.failed,
+            "expired": self.expired,
+            "retries": self.retries,
+            "retry_after": self.retry_after_hits,
+            "latency_p50_ms": pct(0.50),
+            "latency_p95_ms": pct(0.95),
+            "latency_p99_ms": pct(0.99),
+            "latency_max_ms": round(lat[-1] * 1000, 1) if lat else 0.0,
+        }
+        if self.journal:
+            stats["journal"] = self.journal.get_stats()
+        return stats
+
+
+def _utf16_len(text):
+    return len(text.encode('utf-16-le')) // 2
+
+
+class DigestBuffer:
+    """
+    Coalesces low-tier alerts for users who opted into digests.
+
+    The first buffered alert for a chat starts that user's window; when it
+    ends, everything collected is submitted to the delivery engine as one
+    message (split only where the Bot API length limit requires) at the
+    highest tier it contains. Alerts above DIGEST_MAX_LEVEL and chats without
+    a window are not buffered.
+
+    Buffered alerts are held in the engine's journal from the moment they
+    are added and released only after their digest is submitted, so a crash
+    mid-window replays them one by one instead of losing them.
+    """
+
+    def __init__(self, delivery):
+        self.delivery = delivery
+        self.buffers = {}  # chat_id -> [(held msg_id, text, level)]
+        self.timers = {}  # chat_id -> TimerHandle for the end of its window
+        self.tasks = set()
+        self.alerts_buffered = 0
+        self.digests_sent = 0
+
+    def add(self, chat_id, text, level):
+        """Buffer an alert if the chat takes digests at this tier; returns True if it was buffered."""
+        window = user_digests.get(chat_id)
+        if not window or level is None or level > DIGEST_MAX_LEVEL:
+            return False
+        entry = (self.delivery.hold(chat_id, text, level), text, level)
+        buffered = self.buffers.get(chat_id)
+        if buffered is None:
+            self.buffers[chat_id] = [entry]
+            self.timers[chat_id] = asyncio.get_running_loop().call_later(window, self._due, chat_id)
+        else:
+            buffered.append(entry)
+        self.alerts_buffered += 1
+        return True
+
+    def _due(self, chat_id):
+        self.timers.pop(chat_id, None)
+        task = asyncio.create_task(self._flush(chat_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _flush(self, chat_id):
+        alerts = self.buffers.pop(chat_id, None)
+        if not alerts:
+            return
+        level = max(level for _, _, level in alerts)
+        for text in self.compose(chat_id, [text for _, text, _ in alerts]):
+            self.digests_sent += 1
+            await self.delivery.submit(chat_id, text, level)
+        # The digest is journaled now; the individual alerts no longer need to be
+        self.delivery.release([msg_id for msg_id, _, _ in alerts])
+
+    def compose(self, chat_id, texts):
+        """Digest message(s) for `texts`; a lone alert is sent unchanged."""
+        if len(texts) == 1:
+            return texts
+        messages = []
+        current = get_text(get_user_lang(chat_id), 'digest_header', count=len(texts))
+        for text in texts:
+            joined = f"{current}\n\n{text}"
+            if _utf16_len(joined) > MESSAGE_MAX_LEN:
+                messages.append(current)
+                joined = text
+            current = joined
+        messages.append(current)
+        return messages
+
+    async def close(self):
+        """Submit everything still buffered now (shutdown)."""
+        for handle in self.timers.values():
+            handle.cancel()
+        self.timers.clear()
+        for chat_id in list(self.buffers):
+            await self._flush(chat_id)
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def get_stats(self):
+        return {
+            "chats_buffering": len(self.buffers),
+            "alerts_buffered": self.alerts_buffered,
+            "digests_sent": self.digests_sent,
+        }
+
+
+async def _send_message(chat_id, text):
+    await bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown")
+
+delivery = DeliveryEngine(_send_message)
+digests = DigestBuffer(delivery)
+runtime_stats = StatsReporter()  # shown by /stats and logged periodically
+runtime_stats.add("delivery", delivery.get_stats)
+runtime_stats.add("digests", digests.get_stats)
+
+async def send_trade_alert(chat_id, message_text, level=None):
+    """
+    Queue an alert (tier threshold `level`) for delivery, or hold it for the
+    chat's digest; returns once it has been accepted.
+    """
     if not chat_id:
         return
-    try:
-        await bot.send_message(chat_id=chat_id, text=message_text, parse_mode="Markdown")
-    except Exception as e:
-        logger.error(f"Failed to send Telegram message: {e}")
+    if digests.add(chat_id, message_text, level):
+        return
+    await delivery.submit(chat_id, message_text, level)